@@ -0,0 +1,86 @@
+""" Measures the overhead of executing a statement with psycaio.
+
+Usage::
+
+    python benchmarks/execute_overhead.py [-n NUM] [--loop LOOP] [DSN]
+
+A trivial statement is executed *NUM* times with psycaio, and the same number
+of times with a blocking psycopg2 connection to the same server. The
+difference per statement is the overhead of psycaio and the event loop.
+
+Use ``--loop all`` to measure all available loops.
+
+"""
+import argparse
+import asyncio
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from psycopg2 import connect as pg_connect  # noqa: E402
+
+from psycaio import connect  # noqa: E402
+from psycaio.loadgen import get_policies  # noqa: E402
+
+QUERY = "SELECT 1"
+
+
+def measure_blocking(args):
+    cn = pg_connect(args.dsn)
+    cn.autocommit = True
+    cr = cn.cursor()
+    for _ in range(args.warm_up):
+        cr.execute(QUERY)
+    start = perf_counter()
+    for _ in range(args.num):
+        cr.execute(QUERY)
+    elapsed = perf_counter() - start
+    cn.close()
+    return elapsed / args.num
+
+
+async def measure_async(args):
+    cn = await connect(args.dsn)
+    cr = cn.cursor()
+    for _ in range(args.warm_up):
+        await cr.execute(QUERY)
+    start = perf_counter()
+    for _ in range(args.num):
+        await cr.execute(QUERY)
+    elapsed = perf_counter() - start
+    cn.close()
+    return elapsed / args.num
+
+
+def run(args, policy):
+    asyncio.set_event_loop_policy(policy())
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(measure_async(args))
+    finally:
+        loop.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("dsn", nargs="?", default="dbname=postgres")
+    parser.add_argument("-n", "--num", type=int, default=10000)
+    parser.add_argument("--warm-up", type=int, default=100)
+    policies = get_policies()
+    parser.add_argument(
+        "--loop", default="default", choices=sorted(policies) + ["all"])
+    args = parser.parse_args()
+
+    blocking = measure_blocking(args)
+    print(f"blocking psycopg2: {blocking * 1e6:.1f} us per execute")
+    for loop_name in sorted(policies) if args.loop == "all" else [args.loop]:
+        per_execute = run(args, policies[loop_name])
+        print(
+            f"{loop_name}: {per_execute * 1e6:.1f} us per execute, "
+            f"overhead {(per_execute - blocking) * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+""" Measures the Python memory footprint of idle psycaio connections.
+
+Usage::
+
+    python benchmarks/idle_connections.py [-n NUM] [--loop LOOP] [DSN]
+
+The connections are opened with :func:`psycaio.connect` and kept idle. The
+reported number is the amount of memory allocated by Python per connection,
+as measured by :mod:`tracemalloc`. Memory allocated by libpq itself is not
+included.
+
+With ``--unconnected`` no server is needed. The connection objects are created
+without finishing the connection handshake, which still includes all state
+created by psycaio.
+
+"""
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from psycopg2 import connect as pg_connect  # noqa: E402
+
+from psycaio import connect, AioConnection  # noqa: E402
+from psycaio.loadgen import get_policies  # noqa: E402
+
+
+async def open_connection(args):
+    if args.unconnected:
+        return pg_connect(
+            hostaddr="127.0.0.1", port="1", async_=True,
+            connection_factory=AioConnection)
+    return await connect(args.dsn)
+
+
+async def measure(args):
+    # warm up, so lazily imported modules and caches are not counted
+    (await open_connection(args)).close()
+
+    connections = []
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for _ in range(args.num):
+        connections.append(await open_connection(args))
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    for cn in connections:
+        cn.close()
+    return (after - before) / args.num
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("dsn", nargs="?", default="dbname=postgres")
+    parser.add_argument("-n", "--num", type=int, default=1000)
+    parser.add_argument(
+        "--loop", default="default", choices=sorted(get_policies()))
+    parser.add_argument("--unconnected", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.set_event_loop_policy(get_policies()[args.loop]())
+    loop = asyncio.new_event_loop()
+    try:
+        per_connection = loop.run_until_complete(measure(args))
+    finally:
+        loop.close()
+    print(f"{args.loop}: {per_connection:.0f} bytes per idle connection")
+
+
+if __name__ == "__main__":
+    main()
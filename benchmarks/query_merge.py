@@ -0,0 +1,60 @@
+""" Compares merging parameters with psycopg2 and with query templates.
+
+Usage::
+
+    python benchmarks/query_merge.py [-n NUM] [DSN]
+
+For queries with an increasing number of parameters, the parameters are
+merged *NUM* times by psycopg2 (:py:meth:`cursor.mogrify`), and by the
+template of a :class:`psycaio.Query`. No statements are executed, the
+connection is only used to adapt the parameters.
+
+"""
+import argparse
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from psycopg2 import connect as pg_connect  # noqa: E402
+
+from psycaio import Query  # noqa: E402
+from psycaio.query import merge_query  # noqa: E402
+
+NUM_PARAMS = [1, 2, 5, 10, 20, 50]
+
+
+def measure(func, num):
+    start = perf_counter()
+    for _ in range(num):
+        func()
+    return (perf_counter() - start) / num
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("dsn", nargs="?", default="dbname=postgres")
+    parser.add_argument("-n", "--num", type=int, default=100000)
+    args = parser.parse_args()
+
+    cn = pg_connect(args.dsn)
+    cr = cn.cursor()
+    for num_params in NUM_PARAMS:
+        text = "SELECT * FROM items WHERE id IN ({})".format(
+            ", ".join(["%s"] * num_params))
+        query = Query(text)
+        params = tuple(
+            f"value {i}" if i % 2 else i for i in range(num_params))
+        assert merge_query(query, params, cn) == cr.mogrify(text, params)
+
+        mogrify = measure(lambda: cr.mogrify(text, params), args.num)
+        template = measure(lambda: merge_query(query, params, cn), args.num)
+        print(
+            f"{num_params} parameters: psycopg2 {mogrify * 1e6:.2f} us, "
+            f"template {template * 1e6:.2f} us")
+    cn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,16 @@
 from .cursor import AioCursor, AioCursorMixin
 from .conn import AioConnection, AioConnMixin
-from .conn_connect import connect
+from .conn_connect import connect, warm_up
+from .fanout import fan_out
+from .lazy import lazy_connect, LazyConnection
+from .lobject import AioLargeObject
+from .query import Query
+from .shutdown import shutdown
+from .transaction import Transaction
 
 __version__ = "0.3"
 
 __all__ = [
-    "connect", "AioCursor", "AioCursorMixin", "AioConnection", "AioConnMixin"]
+    "connect", "lazy_connect", "warm_up", "fan_out", "shutdown", "AioCursor",
+    "AioCursorMixin", "AioConnection", "AioConnMixin", "AioLargeObject",
+    "LazyConnection", "Query", "Transaction"]
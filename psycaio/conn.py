@@ -1,20 +1,32 @@
 from asyncio import (
-    Lock, Queue, wrap_future, run_coroutine_threadsafe, shield,
-    CancelledError, QueueEmpty)
+    Lock, Queue, wrap_future, run_coroutine_threadsafe, sleep,
+    wait_for, CancelledError, QueueEmpty, TimeoutError)
 from contextlib import contextmanager
+import os
 
 from psycopg2 import OperationalError, InterfaceError
 from psycopg2.extensions import (
-    POLL_OK, POLL_READ, POLL_WRITE, connection as PGConnection,
+    POLL_OK, POLL_READ, POLL_WRITE, TRANSACTION_STATUS_INERROR,
+    TRANSACTION_STATUS_INTRANS, connection as PGConnection,
     cursor as PGCursor)
 
-from .utils import get_running_loop, selector_pool
+from . import metrics
+from .utils import get_running_loop, selector_pool, register_connection
 from .cursor import AioCursorMixin
+from .lobject import open_lobject, CHUNK_SIZE
+from .publish import NotifyPublisher, WINDOW, MAX_BATCH
+from .transaction import Transaction
+from .watchdog import blocking_section
+
+# Number of seconds between checks for running transactions while draining
+DRAIN_INTERVAL = 0.05
 
 
 class NotifyQueue:
     """ Queue that is used for NOTIFY messages """
 
+    __slots__ = ("_queue", "_loop_call_soon_threadsafe", "append")
+
     def __init__(self, connection):
 
         self._queue = Queue()
@@ -69,9 +81,12 @@ class ThreadManager:
     hold on to the thread and the containing loop during the operations.
 
     """
+    __slots__ = ("_usage", "thread")
+
     def __init__(self):
         # The number of operations using this manager
         self._usage = 0
+        self.thread = None
 
     def __enter__(self):
         if self._usage == 0:
@@ -103,7 +118,9 @@ class ThreadManager:
         async def _coro():
             return callback(*args)
 
-        return self._run_coroutine(_coro()).result()
+        fut = self._run_coroutine(_coro())
+        with blocking_section("thread_call"):
+            return fut.result()
 
     async def run_coro(self, coro):
         """ Executes a coroutine in the selector loop and returns the result
@@ -135,8 +152,100 @@ class AioConnMixin:
         else:
             self._thread_manager = None
             self._loop = loop
-        self.notifies = NotifyQueue(self)
-        self._execute_lock = Lock()
+
+        # The lock and the notify queue are created on first use, which keeps
+        # the footprint of idle connections small. Until then, psycopg2 will
+        # add notifies to its default list.
+        self._lock = None
+
+        # Stack of active Transaction objects, created on first use as well
+        self._transactions = None
+
+        # SQL to send in front of the next statement
+        self._pending_sql = None
+
+        # Transactions of which the start statement was sent with the running
+        # statement
+        self._starting = None
+
+        self._draining = False
+
+        # Connections can not be used after a fork
+        self._pid = os.getpid()
+        register_connection(self)
+
+    @property
+    def _execute_lock(self):
+        # All statements go through this lock, so this is where new work is
+        # refused while draining. Running transactions may still finish.
+        self._check_process()
+        if self._draining and not self._in_transaction():
+            raise InterfaceError("connection is draining")
+        lock = self._lock
+        if lock is None:
+            lock = self._lock = Lock()
+        return lock
+
+    def _check_process(self):
+        if self._pid != os.getpid():
+            raise InterfaceError(
+                "connection was opened in another process, it can not be "
+                "used after a fork")
+
+    def _get_notify_queue(self):
+        """ Returns the notify queue, replacing the psycopg2 list if needed """
+        notifies = self.notifies
+        if isinstance(notifies, NotifyQueue):
+            return notifies
+        queue = NotifyQueue(self)
+        self.notifies = queue
+
+        # Move the notifies that were already received. From now on, psycopg2
+        # will use the new queue.
+        put = queue._queue.put_nowait
+        for notify in notifies:
+            put(notify)
+        return queue
+
+    def _bind_loop(self):
+        """ Binds the connection to the running loop.
+
+        The connection must not be in use by its previous loop.
+
+        """
+        self._check_process()
+        loop = get_running_loop()
+        proactor = hasattr(loop, "_proactor")
+        if not proactor and self._thread_manager is None and (
+                self._loop is loop):
+            return
+        lock = self._lock
+        if (lock is not None and lock.locked()) or self._num_readers or (
+                self._thread_manager is not None and
+                self._thread_manager._usage):
+            raise InterfaceError("connection is in use by another loop")
+
+        if proactor:
+            if self._thread_manager is None:
+                self._thread_manager = ThreadManager()
+        else:
+            self._thread_manager = None
+            self._loop = loop
+
+        # The lock and the notify queue belong to the previous loop
+        self._lock = None
+        notifies = self.notifies
+        if isinstance(notifies, NotifyQueue):
+            queue = NotifyQueue(self)
+            old_queue = notifies._queue
+            while not old_queue.empty():
+                queue._queue.put_nowait(old_queue.get_nowait())
+            self.notifies = queue
+
+    def _clear_notify_waiters(self):
+        notifies = self.notifies
+        if isinstance(notifies, NotifyQueue):
+            notifies.clear()
 
     def cursor(
             self, name=None, cursor_factory=None, scrollable=None,
@@ -181,6 +290,169 @@ class AioConnMixin:
                 "base classes should be switched.")
         return cr
 
+    def transaction(self):
+        """ Return an asynchronous context manager that runs the enclosed
+        statements in a transaction.
+
+        When the block ends normally, the transaction is committed. When an
+        exception is raised, including :py:exc:`asyncio.CancelledError`, the
+        transaction is rolled back. Nested blocks use savepoints.
+
+        If a statement in the transaction failed, and the error was caught
+        inside the block, the transaction can not be committed anymore. It is
+        rolled back then and a psycopg2
+        :py:exc:`InternalError <psycopg2.InternalError>` is raised.
+
+        The BEGIN or SAVEPOINT statement is not sent separately, but in front
+        of the first statement executed in the block. A block without any
+        statements does not communicate with the server at all.
+
+        Example:
+
+        .. code-block:: python
+
+            async with cn.transaction():
+                await cr.execute("INSERT INTO orders VALUES (%s)", (1,))
+                async with cn.transaction():
+                    await cr.execute("INSERT INTO lines VALUES (%s)", (1,))
+
+        Note that all statements executed on this connection while the block is
+        active are part of the transaction, also when executed by other tasks.
+
+        """
+        return Transaction(self)
+
+    async def lobject(
+            self, oid=0, mode="rb", new_oid=0, chunk_size=CHUNK_SIZE):
+        """ Open or create a large object and return an
+        :class:`AioLargeObject <psycaio.AioLargeObject>`.
+
+        This is the coroutine version of the psycopg2
+        :py:meth:`psycopg2:connection.lobject` method. If *oid* is 0, a new
+        large object is created, using *new_oid* as its oid if that is not 0.
+        The *mode* is one of ``"r"``, ``"w"`` or ``"rw"``, optionally with a
+        ``"b"`` appended. Text mode is not supported. The *chunk_size* is the
+        maximum number of bytes transferred per round trip.
+
+        Large objects can only be used inside a transaction.
+
+        Example:
+
+        .. code-block:: python
+
+            async with cn.transaction():
+                async with await cn.lobject(oid) as lo:
+                    async for chunk in lo:
+                        await response.write(chunk)
+
+        """
+        return await open_lobject(self, oid, mode, new_oid, chunk_size)
+
+    def publisher(self, window=WINDOW, max_batch=MAX_BATCH):
+        """ Return a :class:`NotifyPublisher <psycaio.publish.NotifyPublisher>`
+        that sends NOTIFY messages over this connection in batches.
+
+        Messages are collected for *window* seconds, or until *max_batch*
+        messages are waiting, and then sent in a single statement.
+
+        """
+        return NotifyPublisher(self, window, max_batch)
+
+    def _in_transaction(self):
+        return bool(self._transactions) or (
+            not self.closed and self._status_in_transaction())
+
+    @property
+    def draining(self):
+        """ True if :meth:`drain <psycaio.AioConnMixin.drain>` was called """
+        return self._draining
+
+    async def drain(self, timeout=None):
+        """ Stop accepting statements, wait for the running ones to finish
+        and close the connection.
+
+        After calling this method, new statements are refused with a psycopg2
+        :py:exc:`InterfaceError <psycopg2.InterfaceError>`, unless they are
+        part of a transaction that is already running. Statements that are
+        already waiting for their turn are still executed. When they are done,
+        and no transaction is running anymore, the connection is closed.
+
+        If that takes longer than *timeout* seconds, the connection is closed
+        anyway, which interrupts the remaining work. The running statement and
+        the statements waiting for their turn then fail with an
+        :py:exc:`InterfaceError <psycopg2.InterfaceError>`.
+
+        """
+        self._draining = True
+        try:
+            await wait_for(self._wait_idle(), timeout)
+        except TimeoutError:
+            pass
+        finally:
+            self.close()
+
+    async def _wait_idle(self):
+        while not self.closed:
+            lock = self._lock
+            if lock is None:
+                lock = self._lock = Lock()
+            # The lock is fair, so this waits for the queued statements
+            async with lock:
+                if not self._in_transaction():
+                    return
+            await sleep(DRAIN_INTERVAL)
+
+    def _has_pending(self):
+        """ Returns if there are statements to send before the next one """
+        if self._pending_sql is not None:
+            return True
+        stack = self._transactions
+        return bool(stack) and not stack[-1]._started
+
+    def _take_pending(self):
+        """ Returns the statements that still need to be sent before the next
+        statement and marks them as sent.
+
+        """
+        statements = []
+        if self._pending_sql is not None:
+            statements.append(self._pending_sql)
+            self._pending_sql = None
+        stack = self._transactions
+        if stack and not stack[-1]._started:
+            starting = []
+            for tr in stack:
+                if not tr._started:
+                    statements.append(tr._start_sql)
+                    tr._started = True
+                    starting.append(tr)
+            self._starting = starting
+        if not statements:
+            return None
+        return ";".join(statements) + ";"
+
+    def _check_started(self):
+        """ Marks the transactions of which the start statement was sent with
+        a failed statement as not started, if no transaction is open.
+
+        PostgreSQL parses all statements in a query string before executing
+        them, so a syntax error in the statement prevents the BEGIN in front
+        of it from running as well.
+
+        """
+        starting = self._starting
+        self._starting = None
+        if starting and (
+                self.closed or not self._status_in_transaction()):
+            for tr in starting:
+                tr._started = False
+
+    def _status_in_transaction(self):
+        # The status is ACTIVE while any statement runs, which does not mean
+        # that a transaction is open.
+        return self.get_transaction_status() in (
+            TRANSACTION_STATUS_INTRANS, TRANSACTION_STATUS_INERROR)
+
     def _start_reading(self, callback):
         """ Adds a reader to the list """
 
@@ -289,7 +561,7 @@ class AioConnMixin:
             if not self._fut.done():
                 self._fut.set_exception(ex)
             if self.closed:
-                self.notifies.clear()
+                self._clear_notify_waiters()
             return
 
         if state == POLL_WRITE:
@@ -311,45 +583,50 @@ class AioConnMixin:
     async def __start_poll(self):
         """ Starts polling after execute """
 
-        self._fut = self._loop.create_future()
+        # The future is awaited directly. A shield would allocate an extra
+        # future and callbacks for every statement, while it is only needed
+        # after a cancellation.
+        fut = self._fut = self._loop.create_future()
         self._start_reading(self._poll)
         try:
             self._poll()
-            await self._wait_poll()
-        finally:
-            self._stop_reading()
-
-    async def _wait_poll(self):
-        fut = self._fut
-        try:
-            # Shield the future so we can still wait for it when we cancel the
-            # operation server side as well.
-            return await shield(fut)
+            await fut
         except CancelledError:
-            if not fut.done():
+            if self.isexecuting():
                 # This routine got cancelled, but the server is still busy
                 # with our statement. Try to cancel the current server
                 # operation as well.
-                try:
-                    await self.cancel()
-                    await fut
-                except Exception:
-                    # Don't bother with this exception.
-                    pass
+                await self._cancel_running()
 
             # And reraise. We got cancelled after all.
             raise
         finally:
-            # Make sure future is done. This is a no-op when fut is
-            # already done.
-            fut.cancel()
+            self._stop_reading()
+
+    async def _cancel_running(self):
+        # The awaited future is cancelled, so use a new one to wait until the
+        # server is done.
+        self._fut = self._loop.create_future()
+        try:
+            await self.cancel()
+            await self._fut
+        except Exception:
+            # Don't bother with this exception.
+            pass
+        finally:
+            self._fut.cancel()
 
     async def _start_poll(self):
-        if self._thread_manager is not None:
-            with self._selector_thread() as tm:
-                await tm.run_coro(self.__start_poll())
-        else:
-            await self.__start_poll()
+        try:
+            if self._thread_manager is not None:
+                with self._selector_thread() as tm:
+                    await tm.run_coro(self.__start_poll())
+            else:
+                await self.__start_poll()
+        except BaseException:
+            self._check_started()
+            raise
+        self._starting = None
 
     async def cancel(self):
         """Cancel the current database operation.
@@ -358,6 +635,8 @@ class AioConnMixin:
         :py:meth:`psycopg2:connection.cancel` method.
 
         """
+        if metrics.enabled:
+            metrics.cancel_requests.inc()
         # original method is always blocking, so resort to threadpool
         await get_running_loop().run_in_executor(None, super().cancel)
 
@@ -368,7 +647,7 @@ class AioConnMixin:
         :py:class:`asyncio.QueueEmpty`.
 
         """
-        return self.notifies._pop_nowait()
+        return self._get_notify_queue()._pop_nowait()
 
     async def get_notify(self):
         """ Remove and return a psycopg2
@@ -377,8 +656,9 @@ class AioConnMixin:
 
         The :py:attr:`psycopg2:connection.notifies` attribute is replaced by
         the :py:class:`psycaio.AioConnMixin` with a custom version that plays
-        nicely with asyncio. Do not set it to anything else or this method will
-        probably break.
+        nicely with asyncio, as soon as notifies are retrieved for the first
+        time. Do not set it to anything else or this method will probably
+        break.
 
         Example:
 
@@ -397,25 +677,27 @@ class AioConnMixin:
         For more information see the PostgreSQL docs on
         `LISTEN <https://www.postgresql.org/docs/current/sql-listen.html>`_.
         """
+        queue = self._get_notify_queue()
         try:
-            return self.get_notify_nowait()
+            return queue._pop_nowait()
         except QueueEmpty:
             pass
 
         # nothing in the Queue. Start reading until we got one
         if self.closed:
             raise InterfaceError("connection already closed")
+        self._check_process()
         if self._thread_manager is not None:
             with self._selector_thread() as tm:
                 tm.call(self._start_reading, self._poll)
                 try:
-                    return await self.notifies._pop()
+                    return await queue._pop()
                 finally:
                     tm.call(self._stop_reading)
         else:
             self._start_reading(self._poll)
             try:
-                return await self.notifies._pop()
+                return await queue._pop()
             finally:
                 self._stop_reading()
 
@@ -423,13 +705,19 @@ class AioConnMixin:
         self._reset_connect()
         super().close()
         self._fd = None
+        # The reader is removed, so a running statement would never finish.
+        # When it fails, the statements waiting for the lock follow, because
+        # they can not be executed on a closed connection.
+        fut = getattr(self, "_fut", None)
+        if fut is not None and not fut.done():
+            fut.set_exception(InterfaceError("connection already closed"))
 
     def close(self):
         """ Close the connection.
 
         Coroutines that are still waiting for a Notify message with
-        :py:meth:`get_notify <psycaio.AioConnMixin.get_notify>` will be
-        interrupted by a psycopg2
+        :py:meth:`get_notify <psycaio.AioConnMixin.get_notify>`, or for a
+        running statement, will be interrupted by a psycopg2
         :py:exc:`InterfaceError <psycopg2.InterfaceError>`.
 
         """
@@ -438,7 +726,7 @@ class AioConnMixin:
                 tm.call(self._close)
         else:
             self._close()
-        self.notifies.clear()
+        self._clear_notify_waiters()
 
 
 class AioConnection(AioConnMixin, PGConnection):
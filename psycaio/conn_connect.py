@@ -1,17 +1,101 @@
-from asyncio import wait_for, CancelledError
+from asyncio import wait_for, gather, CancelledError
 import os
 import socket
+from time import monotonic
 
 from psycopg2 import OperationalError, connect as pg_connect
 from psycopg2.extensions import parse_dsn, connection as PGConnection
 
+from . import metrics
 from .conn import AioConnMixin, AioConnection
 from .cursor import AioCursor
+from .health import host_health
+from .limits import connect_limiter
+from .service import get_service_params
 from .utils import get_running_loop
+from .watchdog import blocking_section
+
+
+def _format_options(options, session_params):
+    """ Adds session parameters to a libpq options value """
+    options = [options] if options else []
+    for name, value in session_params.items():
+        # libpq splits options on white space, unless escaped by a backslash
+        option = f"{name}={value}".replace(
+            "\\", "\\\\").replace(" ", "\\ ")
+        options.append(f"-c {option}")
+    return " ".join(options)
+
+
+def _split_hosts(conn_kwargs):
+    """ Returns a list of host, hostaddr and port tuples for the connection
+    parameters, falling back to the environment variables like libpq.
+
+    """
+    def parse_multi(param_name):
+        param = (conn_kwargs.get(param_name) or
+                 os.environ.get(f"PG{param_name.upper()}"))
+        return str(param).split(',') if param else []
+
+    hostaddrs = parse_multi("hostaddr")
+    hosts = parse_multi("host")
+    ports = parse_multi("port")
+
+    # same logic as in libpq
+    num_host_entries = len(hostaddrs) or len(hosts) or 1
+
+    # Build up three lists for hosts, hostaddrs and ports of equal length.
+    # Lists can contain None for any value
+    if not hostaddrs:
+        hostaddrs = [None] * num_host_entries
+
+    if hosts:
+        # number of hosts must be the same as number of hostaddrs
+        if len(hosts) != num_host_entries:
+            raise OperationalError(
+                f"could not match {len(hosts)} host names to "
+                f"{num_host_entries} hostaddr values")
+    else:
+        hosts = [None] * num_host_entries
+
+    if ports:
+        num_ports = len(ports)
+        # number of ports must be the same as number of host(addr)s or 1
+        if num_ports != num_host_entries:
+            if num_ports != 1:
+                raise OperationalError(
+                    f"could not match {num_ports} port numbers to "
+                    f"{num_host_entries} hosts")
+            # Multiple host(addr) values, but just one port. That is ok.
+            # Stretch the ports list to equal length
+            ports *= num_host_entries
+    else:
+        ports = [None] * num_host_entries
+
+    return list(zip(hosts, hostaddrs, ports))
+
+
+def _merge_service(conn_kwargs):
+    """ Merges the parameters of the service into the connection parameters.
+
+    Returns the service name if the service could not be found, so libpq has
+    to handle it, else None.
+
+    """
+    service = conn_kwargs.get("service") or os.environ.get("PGSERVICE")
+    if service:
+        service_params = get_service_params(service)
+        if service_params is not None:
+            for key, value in service_params.items():
+                if conn_kwargs.get(key) is None:
+                    conn_kwargs[key] = value
+            service = None
+    return service
 
 
 async def connect(
-        dsn=None, connection_factory=None, cursor_factory=None, **kwargs):
+        dsn=None, connection_factory=None, cursor_factory=None,
+        session_params=None, on_connect=None, **kwargs):
     """Open a connection to the database server and return a
     :class:`connection <psycaio.AioConnection>` object.
 
@@ -66,9 +150,53 @@ async def connect(
 
     Asynchronous DNS lookups are performed by this function as well, if
     necessary, because that part of the functionality is always blocking in
-    libpq.
+    libpq. This includes host names from a connection service file. Host names
+    are still passed to libpq next to the looked up addresses, so password
+    file entries keep matching.
+
+    The outcome of each connection attempt is registered process wide. Host
+    entries that failed repeatedly are tried last for a while, and the
+    remaining entries are tried in order of their recent connect latency. See
+    :class:`HostHealth <psycaio.health.HostHealth>`.
+
+    The number of concurrent and the rate of connection attempts can be
+    limited process wide. See
+    :class:`ConnectLimiter <psycaio.limits.ConnectLimiter>`.
+
+    Two extra arguments are available to initialize the session without
+    additional round trips:
+
+    * *session_params* is a mapping of run-time parameter names and values,
+      for example ``{"search_path": "app", "statement_timeout": "5s"}``. These
+      are added to the *options* connection parameter, so the server sets them
+      during connection startup.
+
+    * *on_connect* is an SQL string or a sequence of SQL strings. These are
+      sent to the server as a single batch, directly after the connection is
+      established. If this fails, the connection is closed and the exception
+      is raised.
 
     """
+    async with connect_limiter.slot():
+        cn = await _connect(
+            dsn, connection_factory, cursor_factory, session_params, kwargs)
+
+    if on_connect:
+        if not isinstance(on_connect, str):
+            on_connect = ";".join(on_connect)
+        cr = cn.cursor()
+        try:
+            await cr.execute(on_connect)
+        except BaseException:
+            cn.close()
+            raise
+        finally:
+            cr.close()
+    return cn
+
+
+async def _connect(
+        dsn, connection_factory, cursor_factory, session_params, kwargs):
     if connection_factory is None:
         connection_factory = AioConnection
     if cursor_factory is None:
@@ -98,11 +226,22 @@ async def connect(
     # not notice) and a second connection attempt will never be undertaken
     # because the first attempt uses up the entire timeout.
     #
-    # Note: hostname(s) can be set using a service file. These are not
-    # recognized here and the issues mentioned above are not solved in that
-    # case.
-
-    # first get the timeout
+    # Note: hostname(s) can be set using a service file. The service file is
+    # parsed here as well, so the same applies to those hosts. Explicit
+    # parameters take precedence over the service parameters, just like in
+    # libpq. Only when the service can not be found here, for example
+    # because it lives in the compiled in system location, libpq will handle
+    # it and the issues mentioned above are not solved in that case.
+
+    # merge the service parameters, these might contain a timeout as well
+    service = _merge_service(conn_kwargs)
+
+    if session_params:
+        conn_kwargs["options"] = _format_options(
+            conn_kwargs.get("options") or os.environ.get("PGOPTIONS"),
+            session_params)
+
+    # get the timeout
     timeout = conn_kwargs.get('connect_timeout')
     if timeout is not None:
         timeout = int(timeout)
@@ -114,52 +253,12 @@ async def connect(
 
     loop = get_running_loop()
 
-    if not conn_kwargs.get("service"):
-
-        def parse_multi(param_name):
-            param = (conn_kwargs.get(param_name) or
-                     os.environ.get(f"PG{param_name.upper()}"))
-            return str(param).split(',') if param else []
-
-        hostaddrs = parse_multi("hostaddr")
-        hosts = parse_multi("host")
-        ports = parse_multi("port")
-
-        # same logic as in libpq
-        num_host_entries = len(hostaddrs) or len(hosts) or 1
-
-        # Build up three lists for hosts, hostaddrs and ports of equal length.
-        # Lists can contain None for any value
-        if not hostaddrs:
-            hostaddrs = [None] * num_host_entries
-
-        if hosts:
-            # number of hosts must be the same as number of hostaddrs
-            if len(hosts) != num_host_entries:
-                raise OperationalError(
-                    f"could not match {len(hosts)} host names to "
-                    f"{num_host_entries} hostaddr values")
-        else:
-            hosts = [None] * num_host_entries
-
-        if ports:
-            num_ports = len(ports)
-            # number of ports must be the same as number of host(addr)s or 1
-            if num_ports != num_host_entries:
-                if num_ports != 1:
-                    raise OperationalError(
-                        f"could not match {num_ports} port numbers to "
-                        f"{num_host_entries} hosts")
-                # Multiple host(addr) values, but just one port. That is ok.
-                # Stretch the ports list to equal length
-                ports *= num_host_entries
-        else:
-            ports = [None] * num_host_entries
+    if not service:
 
-        # Now we got three lists of equal length. Loop through them and add
-        # a tuple for each host entry that we find
         host_entries = []
-        for host, hostaddr, port in zip(hosts, hostaddrs, ports):
+        for host, hostaddr, port in _split_hosts(conn_kwargs):
+            # Loop through the host entries and add a tuple for each address
+            # that we find
             if hostaddr or not host or host.startswith('/'):
                 # host address is already provided, host is empty or is a unix
                 # socket address. Just add it to the list
@@ -178,12 +277,14 @@ async def connect(
         )]
 
     exceptions = []
-    for host, hostaddr, port in host_entries:
+    for entry in host_health.order(host_entries):
         # Try to connect for each host entry. The timeout applies
         # to each attempt separately
+        host, hostaddr, port = entry
         conn_kwargs.update(host=host, hostaddr=hostaddr, port=port)
-        cn = pg_connect(connection_factory=connection_factory,
-                        cursor_factory=cursor_factory, **conn_kwargs)
+        with blocking_section("pg_connect"):
+            cn = pg_connect(connection_factory=connection_factory,
+                            cursor_factory=cursor_factory, **conn_kwargs)
 
         # Check base type and order. Psycopg2 already checked if it is a valid
         # psycopg2 connection.
@@ -199,16 +300,58 @@ async def connect(
                 "psycopg2.extensions.connection in method resolution order. "
                 "Maybe base classes should be switched.")
 
+        host_health.attempt(entry)
+        start = monotonic()
         try:
             await wait_for(cn._start_connect_poll(), timeout)
-            return cn
         except CancelledError:
             cn.close()
+            host_health.abort(entry)
             # we got cancelled, do not try next entry
             raise
         except Exception as ex:
             cn.close()
+            host_health.failure(entry)
+            if metrics.enabled:
+                metrics.connect_attempts.inc(
+                    host or hostaddr, port, "failure")
             exceptions.append(ex)
+        else:
+            host_health.success(entry, monotonic() - start)
+            if metrics.enabled:
+                metrics.connect_attempts.inc(
+                    host or hostaddr, port, "success")
+            return cn
     if len(exceptions) == 1:
         raise exceptions[0]
     raise OperationalError(exceptions)
+
+
+async def warm_up(n, dsn=None, **kwargs):
+    """Open *n* connections in parallel and return a list of tuples of a
+    :class:`connection <psycaio.AioConnection>` object and the number of
+    seconds it took to open it.
+
+    The parameters are the same as for the :func:`connect <psycaio.connect>`
+    function. The connections are opened within the limits set for
+    :data:`connect_limiter <psycaio.limits.connect_limiter>`, and the reported
+    time includes the time spent waiting for the limiter.
+
+    If any of the connection attempts fails, the successfully opened
+    connections are closed and the first exception is raised.
+
+    """
+    async def timed_connect():
+        start = monotonic()
+        cn = await connect(dsn, **kwargs)
+        return cn, monotonic() - start
+
+    results = await gather(
+        *[timed_connect() for _ in range(n)], return_exceptions=True)
+    errors = [res for res in results if isinstance(res, BaseException)]
+    if errors:
+        for res in results:
+            if not isinstance(res, BaseException):
+                res[0].close()
+        raise errors[0]
+    return results
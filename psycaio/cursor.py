@@ -1,4 +1,32 @@
-from psycopg2.extensions import cursor as PGCursor
+from asyncio import wait_for, TimeoutError
+from itertools import islice
+import re
+from time import monotonic
+
+from psycopg2.extensions import cursor as PGCursor, encodings
+from psycopg2.sql import Composable
+
+from .hooks import statement_listeners, call_observed, notify_listeners
+from .query import merge_query, split_values
+from .utils import get_running_loop
+
+# Number of seconds the server gets to report a statement timeout, before the
+# statement is cancelled client side.
+TIMEOUT_GRACE = 1.0
+
+# Default number of rows sent at once by executemany with returning
+PAGE_SIZE = 100
+
+# Multiple rows of an INSERT with this clause can conflict with each other
+_ON_CONFLICT = re.compile(rb"\bON\s+CONFLICT\b", re.I)
+
+# Statements to save and restore the statement timeout inside a transaction
+_SAVE_TIMEOUT = (
+    "SELECT set_config('psycaio.statement_timeout', "
+    "current_setting('statement_timeout'), true);")
+_RESTORE_TIMEOUT = (
+    "SELECT set_config('statement_timeout', "
+    "current_setting('psycaio.statement_timeout'), true)")
 
 
 class AioCursorMixin:
@@ -35,27 +63,185 @@ class AioCursorMixin:
         :py:meth:`cursor.callproc` method.
 
         """
+        if self.connection._has_pending():
+            # A function call can not be combined with other statements
+            await self._call_async(self._execute_pending)
+        if statement_listeners:
+            return await call_observed(
+                self, super().callproc, (procname, parameters), None, None)
         return await self._call_async(super().callproc, procname, parameters)
 
-    async def execute(self, query, vars=None):  # noqa
+    def _execute_pending(self):
+        pending = self.connection._take_pending()
+        if pending is not None:
+            super().execute(pending)
+
+    async def execute(self, query, vars=None, timeout=None):  # noqa
         """Execute a database query.
 
         This is the coroutine version of the psycopg2 :py:meth:`cursor.execute`
         method.
 
+        If *timeout* is set, the statement is aborted after that number of
+        seconds, including the time spent waiting for other statements on the
+        same connection. The timeout is sent to the server together with the
+        statement, as a statement_timeout that only applies to this
+        statement. The server will then abort the statement with a
+        :py:exc:`QueryCanceledError <psycopg2.extensions.QueryCanceledError>`.
+        Only if the server does not respond in time, the statement is
+        cancelled client side and an :py:exc:`asyncio.TimeoutError` is
+        raised.
+
+        Because the timeout and the query are sent as multiple statements,
+        the query is executed in a transaction. Statements that can not run
+        in a transaction, like VACUUM, can not be combined with a timeout.
+
         """
-        return await self._call_async(super().execute, query, vars=vars)
+        if timeout is not None:
+            return await self._execute_timeout(query, vars, timeout)
+        if statement_listeners:
+            return await call_observed(
+                self, self._execute, (query, vars), query, vars)
+        return await self._call_async(self._execute, query, vars)
+
+    async def _execute_timeout(self, query, vars, timeout):  # noqa
+        cn = self.connection
+        loop = get_running_loop()
+        deadline = loop.time() + timeout
+        start = monotonic()
+
+        lock = cn._execute_lock
+        if lock.locked():
+            await wait_for(lock.acquire(), timeout)
+        else:
+            await lock.acquire()
+        acquired = monotonic()
+        error = None
+        try:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise TimeoutError()
 
-    async def executemany(self, query, vars_list):
+            timeout_sql = "SET LOCAL statement_timeout = {};".format(
+                max(1, int(remaining * 1000)))
+            in_transaction = cn._in_transaction()
+            if in_transaction:
+                # The statement timeout would last until the end of the
+                # transaction. Save the current value, to restore it before
+                # the next statement.
+                timeout_sql = _SAVE_TIMEOUT + timeout_sql
+
+            ret = self._execute(query, vars, timeout_sql)
+            await wait_for(cn._start_poll(), remaining + TIMEOUT_GRACE)
+            if in_transaction:
+                cn._pending_sql = _RESTORE_TIMEOUT
+            return ret
+        except BaseException as ex:
+            error = ex
+            raise
+        finally:
+            if statement_listeners:
+                notify_listeners(self, query, vars, start, acquired, error)
+            lock.release()
+
+    def _execute(self, query, vars, prefix=None):  # noqa
+        cn = self.connection
+        if vars:
+            # Merge the parameters using the template of the query, if that
+            # is faster than psycopg2
+            merged = merge_query(query, vars, cn)
+            if merged is not None:
+                query = merged
+                vars = None
+        if prefix is not None or cn._has_pending():
+            # Prepend the pending statements. Merge the parameters first, so
+            # nothing is lost when that fails.
+            query = self.mogrify(query, vars)
+            vars = None
+            pending = cn._take_pending()
+            if pending is not None:
+                prefix = pending + (prefix or "")
+            query = prefix.encode() + query
+        return super().execute(query, vars)
+
+    async def executemany(self, query, vars_list, returning=False,
+                          page_size=PAGE_SIZE):
         """Execute a database query against multiple sequences or mappings of
         parameters.
 
         This is the coroutine version of the psycopg2
         :py:meth:`cursor.executemany` method.
 
+        If *returning* is True, the rows returned by the statements, for
+        example by a RETURNING clause, are collected and returned as a list,
+        in the order of *vars_list*. The VALUES group of an INSERT statement
+        is then repeated for up to *page_size* parameter sets, so the rows are
+        inserted with a single statement per page. Queries without a VALUES
+        group, with parameters outside of it or with an ON CONFLICT clause,
+        are executed once per parameter set.
+
+        When searching the VALUES group, only single and double quotes are
+        recognized. Queries with dollar quoting, escape strings or comments
+        around the group should be executed without *returning*.
+
+        Example:
+
+        .. code-block:: python
+
+            ids = await cr.executemany(
+                "INSERT INTO items (name) VALUES (%s) RETURNING id",
+                [("a",), ("b",)], returning=True)
+
         """
-        for variables in vars_list:
-            await self.execute(query, variables)
+        if not returning:
+            for variables in vars_list:
+                await self.execute(query, variables)
+            return None
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+
+        cn = self.connection
+        if isinstance(query, Composable):
+            query = query.as_string(self)
+        if isinstance(query, str):
+            query = query.encode(encodings.get(cn.encoding, "utf-8"))
+        parts = split_values(query)
+        if parts is not None and (
+                b"%" in (parts[0] + parts[2]).replace(b"%%", b"") or
+                _ON_CONFLICT.search(parts[2])):
+            # Parameters outside the VALUES group differ per row. Rows that
+            # conflict within one statement fail with DO UPDATE, and are not
+            # returned with DO NOTHING.
+            parts = None
+        rows = []
+        if parts is None:
+            for variables in vars_list:
+                await self.execute(query, variables)
+                if self.description is not None:
+                    rows.extend(self.fetchall())
+            return rows
+
+        # the query is sent without parameters, so unescape the rest
+        before, group, after = (
+            parts[0].replace(b"%%", b"%"), parts[1],
+            parts[2].replace(b"%%", b"%"))
+        vars_iter = iter(vars_list)
+        while True:
+            page = list(islice(vars_iter, page_size))
+            if not page:
+                break
+            groups = []
+            for variables in page:
+                merged = None
+                if variables:
+                    merged = merge_query(group, variables, cn)
+                if merged is None:
+                    merged = self.mogrify(group, variables)
+                groups.append(merged)
+            await self.execute(before + b",".join(groups) + after)
+            if self.description is not None:
+                rows.extend(self.fetchall())
+        return rows
 
 
 class AioCursor(AioCursorMixin, PGCursor):
@@ -0,0 +1,95 @@
+from asyncio import ensure_future, wait, FIRST_EXCEPTION
+
+from .conn_connect import warm_up
+
+
+async def fan_out(
+        queries, connections=None, concurrency=None, return_exceptions=False,
+        dsn=None, **kwargs):
+    """Execute independent queries concurrently over multiple connections.
+
+    The *queries* are SQL strings or tuples of an SQL string and its
+    parameters. The result is a list with an item for each query, in the same
+    order. An item is the list of fetched rows, or None if the query did not
+    return rows.
+
+    The queries are executed over the given *connections*, one query at a
+    time per connection. If no connections are given, new connections are
+    opened using *dsn* and the remaining keyword arguments, just like the
+    :func:`connect <psycaio.connect>` function, and closed afterwards.
+    The number of connections used is limited by *concurrency* if set, and
+    by the number of queries. A :py:exc:`ValueError` is raised if no
+    connections are left to execute the queries on.
+
+    When a query fails, the queries that are still running are cancelled and
+    the exception is raised. If *return_exceptions* is True, the exception is
+    put in the result list instead and the other queries continue.
+
+    Example:
+
+    .. code-block:: python
+
+        counts = await fan_out([
+            "SELECT count(*) FROM orders",
+            ("SELECT count(*) FROM customers WHERE country = %s", ("NL",)),
+        ], dsn="dbname=shop", concurrency=10)
+
+    """
+    queries = [
+        (query, None) if isinstance(query, (str, bytes)) else query
+        for query in queries]
+    results = [None] * len(queries)
+    if not queries:
+        return results
+
+    num_connections = len(queries)
+    if concurrency is not None:
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        num_connections = min(num_connections, concurrency)
+    if connections is None:
+        own_connections = [
+            cn for cn, _ in await warm_up(num_connections, dsn, **kwargs)]
+        connections = own_connections
+    else:
+        own_connections = []
+        connections = list(connections)[:num_connections]
+        if not connections:
+            raise ValueError("no connections to execute the queries on")
+
+    # shared by the workers, so each query is picked up once
+    indexes = iter(range(len(queries)))
+
+    async def worker(cn):
+        cr = cn.cursor()
+        try:
+            for i in indexes:
+                query, params = queries[i]
+                try:
+                    await cr.execute(query, params)
+                    results[i] = (
+                        None if cr.description is None else cr.fetchall())
+                except Exception as ex:
+                    if not return_exceptions:
+                        raise
+                    results[i] = ex
+        finally:
+            cr.close()
+
+    tasks = [ensure_future(worker(cn)) for cn in connections]
+    try:
+        await wait(tasks, return_when=FIRST_EXCEPTION)
+    finally:
+        # Cancel the siblings after an error, or all of them when we got
+        # cancelled ourselves. Wait for them, so the statements are cancelled
+        # server side before the connections are used again.
+        for task in tasks:
+            task.cancel()
+        await wait(tasks)
+        for cn in own_connections:
+            cn.close()
+
+    for task in tasks:
+        if not task.cancelled() and task.exception() is not None:
+            raise task.exception()
+    return results
@@ -0,0 +1,42 @@
+from hashlib import blake2b
+import re
+
+_TOKENS = re.compile(r"""
+    (?P<comment>--[^\n]*|/\*.*?\*/)
+    | (?P<literal>
+        [eE]'(?:[^'\\]|\\.|'')*'
+        | [bBxXnN]?'(?:[^']|'')*'
+        | \$(?P<tag>[A-Za-z_][A-Za-z0-9_]*|)\$.*?\$(?P=tag)\$
+        | (?<![\w$])(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?
+        | %(?:\([^)]*\))?s
+        | \$\d+)
+    | (?P<ident>"(?:[^"]|"")*"|[A-Za-z_][\w$]*)
+    | (?P<space>\s+)
+    """, re.S | re.X)
+
+
+def _replace(match):
+    kind = match.lastgroup
+    if kind == "literal":
+        return "?"
+    if kind in ("comment", "space"):
+        return " "
+    return match.group()
+
+
+def normalize(query):
+    """ Returns the query text with literals, parameter placeholders and
+    comments removed, and white space collapsed.
+
+    Literals and placeholders are replaced by a question mark. The query can
+    be a str or a bytes object.
+
+    """
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    return " ".join(_TOKENS.sub(_replace, query).split())
+
+
+def fingerprint(query):
+    """ Returns a short hexadecimal identifier of the normalized query """
+    return blake2b(normalize(query).encode(), digest_size=8).hexdigest()
@@ -0,0 +1,132 @@
+from time import monotonic
+import threading
+
+# Number of consecutive failures before a host is considered down
+FAILURE_THRESHOLD = 3
+
+# Number of seconds a host stays down before a single probe is allowed
+RESET_TIMEOUT = 30.0
+
+# Weight of a new latency measurement in the moving average
+LATENCY_WEIGHT = 0.3
+
+# Ranks used for ordering host entries
+_CLOSED = 0
+_HALF_OPEN = 1
+_OPEN = 2
+
+
+class _HostState:
+    """ Health state of a single host entry """
+
+    __slots__ = ("failures", "opened_at", "probing", "latency")
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.latency = None
+
+
+class HostHealth:
+    """ Process wide health administration of host entries.
+
+    A host entry is a tuple of host, hostaddr and port as used by the
+    :func:`connect <psycaio.connect>` function. After *failure_threshold*
+    consecutive failed connection attempts, the circuit breaker for an entry
+    trips. The entry will then be tried last, until *reset_timeout* seconds
+    have passed. After that, a single connection attempt is allowed to probe
+    the host. A successful attempt closes the breaker again.
+
+    Healthy entries are ordered by their recent connect latency.
+
+    """
+
+    def __init__(
+            self, failure_threshold=FAILURE_THRESHOLD,
+            reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._states = {}
+        # connect can be used from multiple threads and loops
+        self._lock = threading.Lock()
+
+    def _rank(self, state, now):
+        if state is None or state.opened_at is None:
+            return _CLOSED
+        if not state.probing and now - state.opened_at >= self.reset_timeout:
+            return _HALF_OPEN
+        return _OPEN
+
+    def order(self, host_entries):
+        """ Returns the host entries, best candidates first.
+
+        Healthy entries come first, sorted by latency. Entries without a
+        latency measurement keep their original order, after the measured
+        ones. Entries that are due for a probe follow, and entries with a
+        tripped breaker are last.
+
+        """
+        now = monotonic()
+        with self._lock:
+            states = self._states
+
+            def sort_key(entry):
+                state = states.get(entry)
+                latency = None if state is None else state.latency
+                return (
+                    self._rank(state, now),
+                    float('inf') if latency is None else latency)
+
+            # sort is stable, so original order is kept for equal keys
+            return sorted(host_entries, key=sort_key)
+
+    def attempt(self, entry):
+        """ Registers the start of a connection attempt """
+        with self._lock:
+            state = self._states.get(entry)
+            if state is not None and (
+                    self._rank(state, monotonic()) == _HALF_OPEN):
+                state.probing = True
+
+    def success(self, entry, latency):
+        """ Registers a successful connection attempt """
+        with self._lock:
+            state = self._states.get(entry)
+            if state is None:
+                state = self._states[entry] = _HostState()
+            state.failures = 0
+            state.opened_at = None
+            state.probing = False
+            if state.latency is None:
+                state.latency = latency
+            else:
+                state.latency += LATENCY_WEIGHT * (latency - state.latency)
+
+    def failure(self, entry):
+        """ Registers a failed connection attempt """
+        with self._lock:
+            state = self._states.get(entry)
+            if state is None:
+                state = self._states[entry] = _HostState()
+            state.failures += 1
+            state.probing = False
+            if (state.opened_at is not None or
+                    state.failures >= self.failure_threshold):
+                # trip the breaker, or keep it open after a failed probe
+                state.opened_at = monotonic()
+
+    def abort(self, entry):
+        """ Registers an attempt that neither failed nor succeeded """
+        with self._lock:
+            state = self._states.get(entry)
+            if state is not None:
+                state.probing = False
+
+    def reset(self):
+        """ Forgets all collected health information """
+        with self._lock:
+            self._states.clear()
+
+
+host_health = HostHealth()
@@ -0,0 +1,62 @@
+import logging
+from time import monotonic
+
+logger = logging.getLogger(__name__)
+
+# Callables that are called after each statement executed by a cursor
+statement_listeners = []
+
+
+def add_statement_listener(listener):
+    """ Registers a callable that is called after each statement.
+
+    The listener is called with the cursor, the query, the parameters, the
+    number of seconds spent waiting for the connection, the number of seconds
+    the statement took, and the exception if the statement failed, else None.
+
+    For :meth:`callproc <psycaio.AioCursorMixin.callproc>`, the query is the
+    statement as sent to the server and the parameters are None.
+
+    The listener is called while the connection is still reserved for the
+    statement, so it should return quickly.
+
+    """
+    statement_listeners.append(listener)
+
+
+def remove_statement_listener(listener):
+    """ Removes a listener registered with
+    :func:`add_statement_listener <psycaio.hooks.add_statement_listener>`.
+
+    """
+    statement_listeners.remove(listener)
+
+
+async def call_observed(cursor, func, args, query, vars):  # noqa
+    """ Runs a statement like AioCursorMixin._call_async and notifies the
+    listeners.
+
+    """
+    cn = cursor.connection
+    start = monotonic()
+    async with cn._execute_lock:
+        acquired = monotonic()
+        try:
+            ret = func(*args)
+            await cn._start_poll()
+        except BaseException as ex:
+            notify_listeners(cursor, query, vars, start, acquired, ex)
+            raise
+        notify_listeners(cursor, query, vars, start, acquired, None)
+        return ret
+
+
+def notify_listeners(cursor, query, vars, start, acquired, error):  # noqa
+    duration = monotonic() - acquired
+    if query is None:
+        query = cursor.query
+    for listener in list(statement_listeners):
+        try:
+            listener(cursor, query, vars, acquired - start, duration, error)
+        except Exception:
+            logger.exception("statement listener %r failed", listener)
@@ -0,0 +1,106 @@
+import json
+
+from psycopg2.extensions import ISQLQuote
+from psycopg2.extras import Json, register_default_json, register_default_jsonb
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# The fastest available decoder
+if orjson is not None:
+    fast_loads = orjson.loads
+else:  # pragma: no cover
+    fast_loads = json.loads
+
+
+def _raw(obj):
+    return obj.raw
+
+
+class LazyJson:
+    """ JSON value that is decoded when it is accessed for the first time.
+
+    The original text is available as :attr:`raw`, so the value can be passed
+    on, for example in an HTTP response, without decoding and encoding it.
+    When used as a query parameter, the original text is sent as well.
+
+    Items can be retrieved like from the decoded value.
+
+    """
+
+    __slots__ = ("raw", "_loads", "_value")
+
+    _unset = object()
+
+    def __init__(self, raw, loads=fast_loads):
+        self.raw = raw
+        self._loads = loads
+        self._value = self._unset
+
+    @property
+    def value(self):
+        """ The decoded value """
+        value = self._value
+        if value is self._unset:
+            value = self._value = self._loads(self.raw)
+        return value
+
+    def encode(self, encoding="utf-8"):
+        """ Returns the original text as bytes """
+        return self.raw.encode(encoding)
+
+    def __getitem__(self, key):
+        return self.value[key]
+
+    def get(self, key, default=None):
+        return self.value.get(key, default)
+
+    def __eq__(self, other):
+        if isinstance(other, LazyJson):
+            other = other.value
+        return self.value == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"LazyJson({self.raw!r})"
+
+    def __conform__(self, proto):
+        if proto is ISQLQuote:
+            return Json(self, dumps=_raw)
+
+
+def register_json(scope=None, loads=None, lazy=False):
+    """ Registers decoders for the json and jsonb types.
+
+    The *scope* is a cursor or a connection, or None to register the
+    decoders globally. The *loads* function decodes a JSON text. It defaults
+    to :func:`orjson.loads` if orjson is installed, or else to
+    :func:`json.loads`.
+
+    If *lazy* is True, values are returned as
+    :class:`LazyJson <psycaio.jsontypes.LazyJson>` objects, which are only
+    decoded when accessed.
+
+    Example:
+
+    .. code-block:: python
+
+        cr = cn.cursor()
+        register_json(cr, lazy=True)
+        await cr.execute("SELECT doc FROM documents WHERE id = %s", (1,))
+        doc = cr.fetchone()[0]
+        response.body = doc.encode()
+
+    """
+    if loads is None:
+        loads = fast_loads
+    if lazy:
+        def decode(raw, loads=loads):
+            return LazyJson(raw, loads)
+    else:
+        decode = loads
+    register_default_json(scope, globally=scope is None, loads=decode)
+    register_default_jsonb(scope, globally=scope is None, loads=decode)
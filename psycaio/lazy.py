@@ -0,0 +1,253 @@
+from asyncio import ensure_future, shield, CancelledError, QueueEmpty
+
+from psycopg2 import InterfaceError, ProgrammingError
+
+from .conn_connect import connect
+
+# Cursor attributes before the first statement, like psycopg2
+_CURSOR_DEFAULTS = {
+    "description": None,
+    "rowcount": -1,
+    "rownumber": 0,
+    "lastrowid": 0,
+    "query": None,
+    "statusmessage": None,
+    "arraysize": 1,
+    "itersize": 2000,
+}
+
+
+def lazy_connect(dsn=None, **kwargs):
+    """Return a :class:`LazyConnection <psycaio.LazyConnection>` that will
+    connect on first use.
+
+    The parameters are the same as for the :func:`connect <psycaio.connect>`
+    function. No connection is made by this function.
+
+    """
+    return LazyConnection(dsn, kwargs)
+
+
+class LazyConnection:
+    """ Connection proxy that opens the actual connection when it is needed
+    for the first time.
+
+    The proxy offers the same methods as
+    :class:`AioConnMixin <psycaio.AioConnMixin>`. The connection is opened
+    when a statement is executed or callproc is called for the first time,
+    by a cursor from the :meth:`cursor` method, or when waiting for a notify
+    message with :meth:`get_notify`. Concurrent first uses share a single
+    connection attempt. A failed attempt is retried on the next use.
+
+    Other attributes are taken from the actual connection, after it is
+    opened.
+
+    This class should not be instantiated directly. Use the
+    :func:`lazy_connect <psycaio.lazy_connect>` function instead.
+
+    """
+    __module__ = 'psycaio'
+
+    def __init__(self, dsn, kwargs):
+        self._dsn = dsn
+        self._kwargs = kwargs
+        self._connection = None
+        self._connecting = None
+        self._closed = False
+
+    @property
+    def connected(self):
+        """ True if the actual connection is opened """
+        return self._connection is not None
+
+    @property
+    def closed(self):
+        if self._connection is not None:
+            return self._connection.closed
+        return int(self._closed)
+
+    async def get_connection(self):
+        """ Returns the actual connection, opening it if necessary """
+        cn = self._connection
+        if cn is not None:
+            return cn
+        if self._closed:
+            raise InterfaceError("connection already closed")
+
+        task = self._connecting
+        if task is None:
+            task = self._connecting = ensure_future(
+                connect(self._dsn, **self._kwargs))
+        try:
+            # The attempt is shared, do not cancel it for other waiters
+            cn = await shield(task)
+        except CancelledError:
+            if task.cancelled() and self._closed:
+                # cancelled by close()
+                raise InterfaceError("connection already closed") from None
+            raise
+        except Exception:
+            if self._connecting is task:
+                # allow a new attempt
+                self._connecting = None
+            raise
+        if self._closed:
+            # closed while connecting
+            cn.close()
+            raise InterfaceError("connection already closed")
+        if self._connection is None:
+            self._connection = cn
+        return cn
+
+    def __getattr__(self, name):
+        cn = self._connection
+        if cn is None:
+            raise InterfaceError(
+                f"attribute {name!r} is not available before the connection "
+                "is opened")
+        return getattr(cn, name)
+
+    def cursor(self, *args, **kwargs):
+        """ Return a cursor. If the connection is not opened yet, a
+        :class:`LazyCursor <psycaio.lazy.LazyCursor>` is returned, which
+        opens the connection on its first statement.
+
+        """
+        if self._connection is not None:
+            return self._connection.cursor(*args, **kwargs)
+        return LazyCursor(self, args, kwargs)
+
+    def transaction(self):
+        """ Return an asynchronous context manager for a transaction. The
+        connection is opened when the block is entered.
+
+        """
+        return _LazyTransaction(self)
+
+    async def lobject(self, *args, **kwargs):
+        return await (await self.get_connection()).lobject(*args, **kwargs)
+
+    async def get_notify(self):
+        return await (await self.get_connection()).get_notify()
+
+    def get_notify_nowait(self):
+        if self._connection is None:
+            raise QueueEmpty()
+        return self._connection.get_notify_nowait()
+
+    async def cancel(self):
+        if self._connection is not None:
+            await self._connection.cancel()
+
+    async def drain(self, timeout=None):
+        if self._connection is not None:
+            self._closed = True
+            await self._connection.drain(timeout)
+        else:
+            self.close()
+
+    def close(self):
+        self._closed = True
+        if self._connection is not None:
+            self._connection.close()
+        elif self._connecting is not None:
+            self._connecting.cancel()
+            self._connecting = None
+
+
+class _LazyTransaction:
+    """ Opens the connection before starting a transaction """
+
+    def __init__(self, lazy_connection):
+        self._lazy_connection = lazy_connection
+        self._transaction = None
+
+    async def __aenter__(self):
+        cn = await self._lazy_connection.get_connection()
+        self._transaction = cn.transaction()
+        return await self._transaction.__aenter__()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        return await self._transaction.__aexit__(
+            exc_type, exc_value, traceback)
+
+
+class LazyCursor:
+    """ Cursor proxy of a :class:`LazyConnection <psycaio.LazyConnection>`
+    that was not opened yet.
+
+    The actual cursor is created on the first statement. Before that, the
+    attributes have their initial values, and fetching raises a
+    :py:exc:`ProgrammingError <psycopg2.ProgrammingError>`.
+
+    """
+
+    def __init__(self, lazy_connection, args, kwargs):
+        self.__dict__.update(
+            _lazy_connection=lazy_connection, _args=args, _kwargs=kwargs,
+            _cursor=None, _attrs={}, _closed=False)
+
+    @property
+    def closed(self):
+        if self._cursor is not None:
+            return self._cursor.closed
+        return self._closed
+
+    async def _get_cursor(self):
+        cr = self._cursor
+        if cr is None:
+            if self._closed:
+                raise InterfaceError("cursor already closed")
+            cn = await self._lazy_connection.get_connection()
+            cr = self._cursor
+            if cr is None:
+                cr = cn.cursor(*self._args, **self._kwargs)
+                for name, value in self._attrs.items():
+                    setattr(cr, name, value)
+                self.__dict__["_cursor"] = cr
+        return cr
+
+    def __getattr__(self, name):
+        cr = self._cursor
+        if cr is not None:
+            return getattr(cr, name)
+        if name in self._attrs:
+            return self._attrs[name]
+        if name in _CURSOR_DEFAULTS:
+            return _CURSOR_DEFAULTS[name]
+        if name.startswith("fetch") or name == "scroll":
+            return self._no_results
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        cr = self._cursor
+        if cr is not None:
+            setattr(cr, name, value)
+        else:
+            self._attrs[name] = value
+
+    @property
+    def connection(self):
+        return self._lazy_connection
+
+    def _no_results(self, *args, **kwargs):
+        raise ProgrammingError("no results to fetch")
+
+    async def execute(self, *args, **kwargs):
+        return await (await self._get_cursor()).execute(*args, **kwargs)
+
+    async def executemany(self, *args, **kwargs):
+        return await (await self._get_cursor()).executemany(*args, **kwargs)
+
+    async def callproc(self, *args, **kwargs):
+        return await (await self._get_cursor()).callproc(*args, **kwargs)
+
+    def close(self):
+        if self._cursor is not None:
+            self._cursor.close()
+        self.__dict__["_closed"] = True
+
+    def __iter__(self):
+        if self._cursor is None:
+            self._no_results()
+        return iter(self._cursor)
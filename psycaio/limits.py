@@ -0,0 +1,94 @@
+from asyncio import sleep
+from time import monotonic
+import threading
+
+from .utils import FairSemaphore
+
+
+class _Slot:
+    """ Async context manager holding one connect slot """
+
+    __slots__ = ("_limiter", "_semaphore")
+
+    def __init__(self, limiter):
+        self._limiter = limiter
+        self._semaphore = None
+
+    async def __aenter__(self):
+        limiter = self._limiter
+        semaphore = limiter._semaphore
+        if semaphore is not None:
+            await semaphore.acquire()
+            self._semaphore = semaphore
+        try:
+            delay = limiter._reserve_start()
+            if delay > 0:
+                await sleep(delay)
+        except BaseException:
+            self._release()
+            raise
+        return self
+
+    def _release(self):
+        semaphore = self._semaphore
+        if semaphore is not None:
+            self._semaphore = None
+            semaphore.release()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self._release()
+
+
+class ConnectLimiter:
+    """ Process wide limiter for connection attempts.
+
+    At most *max_concurrent* calls of :func:`connect <psycaio.connect>` are
+    running at the same time, including the DNS lookups, and at most *rate*
+    calls are started per second. Waiting calls are served in order of
+    arrival. Both limits are disabled by default.
+
+    """
+
+    def __init__(self, max_concurrent=None, rate=None):
+        self._lock = threading.Lock()
+        self.configure(max_concurrent, rate)
+
+    def configure(self, max_concurrent=None, rate=None):
+        """ Sets new limits. A value of None disables the limit.
+
+        Connection attempts that are already waiting or running are not
+        affected by a new concurrency limit.
+
+        """
+        if max_concurrent is not None and max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive")
+        with self._lock:
+            self.max_concurrent = max_concurrent
+            self.rate = rate
+            self._semaphore = (
+                None if max_concurrent is None
+                else FairSemaphore(max_concurrent))
+            self._interval = None if rate is None else 1 / rate
+            self._next_start = 0.0
+
+    def _reserve_start(self):
+        """ Reserves a start time and returns the delay until then """
+        if self._interval is None:
+            return 0
+        with self._lock:
+            now = monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self._interval
+        return start - now
+
+    def slot(self):
+        """ Returns an async context manager that waits for and holds a connect
+        slot.
+
+        """
+        return _Slot(self)
+
+
+connect_limiter = ConnectLimiter()
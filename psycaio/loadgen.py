@@ -0,0 +1,339 @@
+""" Load generator that replays a workload against PostgreSQL with psycaio.
+
+Usage::
+
+    python -m psycaio.loadgen [options] WORKLOAD
+
+The workload is a JSON file with a list of statements. Each statement has
+the SQL text, optional parameter generators and an optional weight:
+
+.. code-block:: json
+
+    {
+        "setup": ["CREATE TEMP TABLE items (id int, name text)"],
+        "statements": [
+            {
+                "sql": "SELECT * FROM items WHERE id = %s",
+                "params": [{"int": [1, 1000]}],
+                "weight": 9
+            },
+            {
+                "sql": "INSERT INTO items VALUES (%(id)s, %(name)s)",
+                "params": {"id": {"sequence": 1}, "name": {"text": 20}}
+            }
+        ]
+    }
+
+The setup statements are executed once on every connection. The parameter
+generators are:
+
+* ``{"int": [low, high]}``: random integer, both ends included
+* ``{"float": [low, high]}``: random floating point number
+* ``{"choice": [value, ...]}``: random value from the list
+* ``{"text": length}``: random text of letters and digits
+* ``{"uuid": true}``: random UUID text
+* ``{"sequence": start}``: increasing integer, shared by all workers
+* ``{"value": value}``: constant value
+
+Statements are picked at random, according to their weight, by a number of
+concurrent workers that share the connections. Every report interval, the
+throughput, latency percentiles, errors and event loop lag are reported,
+and a summary is reported at the end.
+
+"""
+import argparse
+import asyncio
+from collections import Counter
+import itertools
+import json
+import math
+import random
+import string
+import sys
+from time import perf_counter
+import uuid
+
+from .conn_connect import connect
+from .utils import get_running_loop
+from .watchdog import Watchdog
+
+_TEXT_CHARS = string.ascii_letters + string.digits
+
+
+class ForcedProactorPolicy(asyncio.DefaultEventLoopPolicy):
+    """ Uses the proactor code path of psycaio on a selector loop """
+
+    def new_event_loop(self):
+        loop = super().new_event_loop()
+        loop._proactor = "yes"
+        return loop
+
+
+def get_policies():
+    """ Returns a dictionary of the available loop policies by name """
+    policies = {"default": asyncio.DefaultEventLoopPolicy}
+    if hasattr(asyncio, "WindowsProactorEventLoopPolicy"):
+        policies["selector"] = asyncio.WindowsSelectorEventLoopPolicy
+        policies["proactor"] = asyncio.WindowsProactorEventLoopPolicy
+    else:
+        policies["forced-proactor"] = ForcedProactorPolicy
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        policies["uvloop"] = uvloop.EventLoopPolicy
+    return policies
+
+
+def make_generator(spec, rng):
+    """ Returns a function without arguments that generates a parameter
+    value according to *spec*.
+
+    """
+    if not isinstance(spec, dict) or len(spec) != 1:
+        raise ValueError(f"invalid parameter generator: {spec!r}")
+    (kind, arg), = spec.items()
+    if kind == "int":
+        low, high = arg
+        return lambda: rng.randint(low, high)
+    if kind == "float":
+        low, high = arg
+        return lambda: rng.uniform(low, high)
+    if kind == "choice":
+        if not arg:
+            raise ValueError("choice needs at least one value")
+        return lambda: rng.choice(arg)
+    if kind == "text":
+        return lambda: "".join(rng.choices(_TEXT_CHARS, k=arg))
+    if kind == "uuid":
+        return lambda: str(uuid.UUID(int=rng.getrandbits(128), version=4))
+    if kind == "sequence":
+        return itertools.count(arg).__next__
+    if kind == "value":
+        return lambda: arg
+    raise ValueError(f"unknown parameter generator: {kind!r}")
+
+
+class Statement:
+    """ Statement of a workload, with its parameter generators """
+
+    def __init__(self, sql, params, weight):
+        self.sql = sql
+        self.weight = weight
+        self._params = params
+
+    def params(self):
+        """ Returns a new set of parameters """
+        params = self._params
+        if params is None:
+            return None
+        if isinstance(params, dict):
+            return {name: gen() for name, gen in params.items()}
+        return [gen() for gen in params]
+
+
+class Workload:
+    """ Statements and setup statements of a workload """
+
+    def __init__(self, statements, setup=()):
+        if not statements:
+            raise ValueError("workload has no statements")
+        self.statements = statements
+        self.setup = list(setup)
+        self._weights = list(
+            itertools.accumulate(st.weight for st in statements))
+
+    @classmethod
+    def from_dict(cls, data, rng):
+        """ Creates a workload from the parsed JSON data """
+        statements = []
+        for item in data.get("statements", []):
+            params = item.get("params")
+            if isinstance(params, dict):
+                params = {
+                    name: make_generator(spec, rng)
+                    for name, spec in params.items()}
+            elif params is not None:
+                params = [make_generator(spec, rng) for spec in params]
+            weight = item.get("weight", 1)
+            if weight <= 0:
+                raise ValueError("weight must be positive")
+            statements.append(Statement(item["sql"], params, weight))
+        return cls(statements, data.get("setup", ()))
+
+    def pick(self, rng):
+        """ Returns a random statement, according to the weights """
+        return rng.choices(self.statements, cum_weights=self._weights)[0]
+
+
+def percentile(values, fraction):
+    """ Returns the value below which *fraction* of the sorted *values*
+    fall, using the nearest rank.
+
+    """
+    if not values:
+        return None
+    index = math.ceil(len(values) * fraction) - 1
+    return values[max(0, min(len(values) - 1, index))]
+
+
+class Results:
+    """ Latencies and errors of a period """
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = Counter()
+
+    def summary(self, elapsed, lag):
+        """ Returns a dictionary with the statistics of the period """
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        errors = sum(self.errors.values())
+        return {
+            "elapsed": elapsed,
+            "statements": count,
+            "throughput": count / elapsed if elapsed > 0 else 0.0,
+            "p50": percentile(latencies, 0.5),
+            "p90": percentile(latencies, 0.9),
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else None,
+            "errors": errors,
+            "error_rate": errors / (count + errors) if count + errors else 0.0,
+            "error_types": dict(self.errors),
+            "loop_lag_max": lag.get("max"),
+            "loop_lag_mean": (
+                lag["total"] / lag["count"] if lag.get("count") else None),
+        }
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.2f}ms"
+
+
+def format_summary(summary):
+    """ Returns a single line text version of a summary """
+    return (
+        f"{summary['elapsed']:.1f}s {summary['statements']} statements "
+        f"{summary['throughput']:.0f}/s p50={_ms(summary['p50'])} "
+        f"p90={_ms(summary['p90'])} p99={_ms(summary['p99'])} "
+        f"max={_ms(summary['max'])} errors={summary['errors']} "
+        f"({summary['error_rate']:.2%}) "
+        f"lag_max={_ms(summary['loop_lag_max'])}")
+
+
+async def _worker(workload, connection, rng, deadline, results):
+    loop = get_running_loop()
+    cr = connection.cursor()
+    while loop.time() < deadline:
+        statement = workload.pick(rng)
+        start = perf_counter()
+        try:
+            await cr.execute(statement.sql, statement.params())
+            if cr.description is not None:
+                cr.fetchall()
+        except Exception as ex:
+            for result in results:
+                result.errors[type(ex).__name__] += 1
+            if connection.closed:
+                raise
+        else:
+            duration = perf_counter() - start
+            for result in results:
+                result.latencies.append(duration)
+
+
+async def run(workload, args, out=sys.stdout):
+    """ Runs the workload and returns the summary of the entire run """
+    rng = random.Random(args.seed)
+    connections = [
+        await connect(args.dsn) for _ in range(args.connections)]
+    watchdog = Watchdog(threshold=float("inf"))
+    monitor = asyncio.ensure_future(watchdog.monitor(0.01))
+    try:
+        for cn in connections:
+            if workload.setup:
+                await cn.cursor().execute(";".join(workload.setup))
+
+        loop = get_running_loop()
+        start = loop.time()
+        deadline = start + args.duration
+        # results of the period and of the entire run
+        results = [Results(), Results()]
+        workers = asyncio.ensure_future(asyncio.gather(*[
+            _worker(
+                workload, connections[i % len(connections)],
+                random.Random(rng.random()), deadline, results)
+            for i in range(args.concurrency)]))
+
+        period_start = start
+        total_lag = {"count": 0, "total": 0.0, "max": 0.0}
+        while not workers.done():
+            await asyncio.wait([workers], timeout=args.interval)
+            now = loop.time()
+            lag = watchdog.snapshot(reset=True).get("loop_lag", {})
+            if lag:
+                total_lag["count"] += lag["count"]
+                total_lag["total"] += lag["total"]
+                total_lag["max"] = max(total_lag["max"], lag["max"])
+            period = results[0]
+            results[0] = Results()
+            print(format_summary(period.summary(now - period_start, lag)),
+                  file=out)
+            period_start = now
+        await workers
+        summary = results[1].summary(loop.time() - start, total_lag)
+    finally:
+        monitor.cancel()
+        for cn in connections:
+            cn.close()
+    return summary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m psycaio.loadgen",
+        description="Replays a workload against PostgreSQL with psycaio.")
+    parser.add_argument("workload", help="workload JSON file")
+    parser.add_argument("--dsn", default="dbname=postgres")
+    parser.add_argument(
+        "-c", "--concurrency", type=int, default=10,
+        help="number of concurrent workers")
+    parser.add_argument(
+        "-n", "--connections", type=int, default=10,
+        help="number of connections")
+    parser.add_argument(
+        "-d", "--duration", type=float, default=10.0,
+        help="number of seconds to run")
+    parser.add_argument(
+        "-i", "--interval", type=float, default=1.0,
+        help="number of seconds between reports")
+    parser.add_argument(
+        "--loop", default="default", choices=sorted(get_policies()))
+    parser.add_argument("--seed", type=int, help="random seed")
+    parser.add_argument(
+        "--json", action="store_true", help="print the summary as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with open(args.workload, encoding="utf-8") as f:
+        data = json.load(f)
+    workload = Workload.from_dict(data, random.Random(args.seed))
+
+    asyncio.set_event_loop_policy(get_policies()[args.loop]())
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        summary = loop.run_until_complete(run(workload, args))
+    finally:
+        loop.close()
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print("total: " + format_summary(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+from psycopg2 import NotSupportedError, ProgrammingError
+
+# Default number of bytes transferred per round trip
+CHUNK_SIZE = 256 * 1024
+
+# Mode flags of lo_open
+INV_WRITE = 0x20000
+INV_READ = 0x40000
+
+_MODES = {
+    "r": INV_READ,
+    "w": INV_WRITE,
+    "rw": INV_READ | INV_WRITE,
+}
+
+
+def _parse_mode(mode):
+    if "t" in mode:
+        raise NotSupportedError(
+            "text mode is not supported for asynchronous large objects")
+    try:
+        return _MODES[mode.replace("b", "") or "r"]
+    except KeyError:
+        raise ValueError(f"invalid mode: {mode!r}") from None
+
+
+class AioLargeObject:
+    """ Asynchronous version of the psycopg2
+    :py:class:`lobject <psycopg2:psycopg2.extensions.lobject>` class, using
+    the server side large object functions.
+
+    Large objects can only be used inside a transaction, and are closed
+    automatically when the transaction ends.
+
+    Data is transferred in pieces of at most *chunk_size* bytes. Iterating
+    asynchronously over the object yields chunks until the end of the
+    object is reached, which allows streaming the content without keeping it
+    in memory.
+
+    This class should not be instantiated directly. Use the
+    :meth:`AioConnMixin.lobject <psycaio.AioConnMixin.lobject>` method
+    instead.
+
+    """
+    __module__ = 'psycaio'
+
+    def __init__(self, connection, oid, fd, mode, chunk_size):
+        self.connection = connection
+        self.oid = oid
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self._fd = fd
+        self._cursor = connection.cursor()
+
+    @property
+    def closed(self):
+        return self._fd is None
+
+    async def _fetch(self, query, vars):  # noqa
+        if self._fd is None:
+            raise ProgrammingError("the large object is closed")
+        cr = self._cursor
+        await cr.execute(query, vars)
+        return cr.fetchone()[0]
+
+    async def read(self, size=-1):
+        """ Reads at most *size* bytes, or all remaining bytes if *size* is
+        negative.
+
+        """
+        if size >= 0:
+            return await self._read(size)
+        chunks = []
+        while True:
+            chunk = await self._read(self.chunk_size)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+    async def _read(self, size):
+        # read in pieces of at most chunk_size
+        chunks = []
+        while size > 0:
+            chunk = bytes(await self._fetch(
+                "SELECT loread(%s, %s)",
+                (self._fd, min(size, self.chunk_size))))
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    async def write(self, data):
+        """ Writes *data* and returns the number of bytes written """
+        data = memoryview(data)
+        chunk_size = self.chunk_size
+        written = 0
+        for pos in range(0, len(data), chunk_size):
+            written += await self._fetch(
+                "SELECT lowrite(%s, %s)",
+                (self._fd, data[pos:pos + chunk_size].tobytes()))
+        return written
+
+    async def write_from(self, chunks):
+        """ Writes all chunks from an iterable or asynchronous iterable of
+        bytes-like objects, and returns the number of bytes written.
+
+        """
+        written = 0
+        if hasattr(chunks, "__aiter__"):
+            async for chunk in chunks:
+                written += await self.write(chunk)
+        else:
+            for chunk in chunks:
+                written += await self.write(chunk)
+        return written
+
+    async def __aiter__(self):
+        while True:
+            chunk = await self._read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    async def seek(self, offset, whence=0):
+        """ Sets the position, relative to the start (*whence* 0), the
+        current position (1) or the end (2), and returns the new position.
+
+        """
+        return await self._fetch(
+            "SELECT lo_lseek64(%s, %s, %s)", (self._fd, offset, whence))
+
+    async def tell(self):
+        """ Returns the current position """
+        return await self._fetch("SELECT lo_tell64(%s)", (self._fd,))
+
+    async def truncate(self, len=0):  # noqa
+        """ Truncates the object to *len* bytes """
+        await self._fetch("SELECT lo_truncate64(%s, %s)", (self._fd, len))
+
+    async def close(self):
+        """ Closes the large object """
+        if self._fd is None:
+            return
+        await self._fetch("SELECT lo_close(%s)", (self._fd,))
+        self._fd = None
+        self._cursor.close()
+
+    async def unlink(self):
+        """ Closes and deletes the large object """
+        await self.close()
+        cr = self.connection.cursor()
+        try:
+            await cr.execute("SELECT lo_unlink(%s)", (self.oid,))
+        finally:
+            cr.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if self._fd is not None and not self.connection.closed:
+            await self.close()
+
+
+async def open_lobject(connection, oid, mode, new_oid, chunk_size):
+    """ Opens or creates a large object """
+    flags = _parse_mode(mode)
+    if not connection._in_transaction():
+        raise ProgrammingError(
+            "large objects can only be used inside a transaction")
+
+    cr = connection.cursor()
+    try:
+        if oid:
+            await cr.execute("SELECT %s, lo_open(%s, %s)", (oid, oid, flags))
+        else:
+            # create and open in one round trip
+            await cr.execute(
+                "SELECT lo_oid, lo_open(lo_oid, %s) "
+                "FROM lo_create(%s) AS lo_oid", (flags, new_oid))
+        oid, fd = cr.fetchone()
+    finally:
+        cr.close()
+    return AioLargeObject(connection, oid, fd, mode, chunk_size)
@@ -0,0 +1,214 @@
+import threading
+
+from .utils import get_connections, selector_pool
+
+# Checked by psycaio before updating counters. Gauges are collected when the
+# metrics are rendered, so they cost nothing while not scraped.
+enabled = False
+
+
+def enable():
+    """ Starts updating the psycaio counters """
+    global enabled
+    enabled = True
+
+
+def disable():
+    """ Stops updating the psycaio counters """
+    global enabled
+    enabled = False
+
+
+def _escape_help(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape(value):
+    return _escape_help(str(value)).replace('"', '\\"')
+
+
+def _format_sample(name, labelnames, labels, value):
+    if labelnames:
+        label_text = ",".join(
+            f'{label_name}="{_escape("" if label is None else label)}"'
+            for label_name, label in zip(labelnames, labels))
+        name = f"{name}{{{label_text}}}"
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return f"{name} {value}"
+
+
+class _Metric:
+    """ Metric with a value per combination of labels """
+
+    type = None
+
+    def __init__(self, name, help, labelnames=()):  # noqa
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        # metrics can be updated from multiple threads
+        self._lock = threading.Lock()
+
+    def _add(self, amount, labels):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, *labels):
+        """ Returns the value for the labels """
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        """ Returns a list of label values and value tuples """
+        with self._lock:
+            return list(self._values.items())
+
+    def clear(self):
+        """ Removes all values """
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """ Metric that only goes up """
+
+    type = "counter"
+
+    def inc(self, *labels, amount=1):
+        """ Increases the value for the labels """
+        if amount < 0:
+            raise ValueError("counters can only be increased")
+        self._add(amount, labels)
+
+
+class Gauge(_Metric):
+    """ Metric that can go up and down """
+
+    type = "gauge"
+
+    def inc(self, *labels, amount=1):
+        """ Increases the value for the labels """
+        self._add(amount, labels)
+
+    def dec(self, *labels, amount=1):
+        """ Decreases the value for the labels """
+        self._add(-amount, labels)
+
+    def set(self, *labels, value):
+        """ Sets the value for the labels """
+        with self._lock:
+            self._values[labels] = value
+
+
+class MetricsRegistry:
+    """ Collection of metrics that can be rendered in the Prometheus text
+    format.
+
+    Besides metrics, collectors can be added. A collector is a function that
+    is called when the metrics are rendered, and returns a list of metrics
+    with their current values.
+
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help, labelnames=()):  # noqa
+        """ Creates and registers a :class:`Counter` """
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help, labelnames=()):  # noqa
+        """ Creates and registers a :class:`Gauge` """
+        metric = Gauge(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """ Adds a function that returns a list of metrics """
+        self._collectors.append(collector)
+
+    def render(self):
+        """ Returns the metrics in the Prometheus text format """
+        metrics = list(self._metrics)
+        for collector in self._collectors:
+            metrics.extend(collector())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for labels, value in sorted(
+                    metric.samples(), key=lambda sample: str(sample[0])):
+                lines.append(_format_sample(
+                    metric.name, metric.labelnames, labels, value))
+        lines.append("")
+        return "\n".join(lines)
+
+
+def _collect():
+    """ Collects the gauges of the connections and the selector threads """
+    open_connections = Gauge(
+        "psycaio_connections_open", "Number of open connections")
+    executing = Gauge(
+        "psycaio_statements_in_flight",
+        "Number of connections executing a statement")
+    waiters = Gauge(
+        "psycaio_execute_lock_waiters",
+        "Number of statements waiting for their connection")
+    notifies = Gauge(
+        "psycaio_notify_queue_depth",
+        "Number of received notify messages that are not retrieved yet")
+    threads = Gauge(
+        "psycaio_selector_thread_connections",
+        "Number of connections using a selector thread", ("thread",))
+    for gauge in (open_connections, executing, waiters, notifies):
+        gauge.set(value=0)
+
+    for cn in get_connections():
+        if cn.closed:
+            continue
+        open_connections.inc()
+        lock = cn._lock
+        if lock is not None and lock.locked():
+            executing.inc()
+            # asyncio does not expose the number of waiters
+            waiters.inc(amount=len(getattr(lock, "_waiters", None) or ()))
+        queue = cn.notifies
+        queue = getattr(queue, "_queue", queue)
+        notifies.inc(
+            amount=queue.qsize() if hasattr(queue, "qsize") else len(queue))
+
+    for thread in list(selector_pool.threads):
+        threads.set(thread.name, value=thread.num)
+    return [open_connections, executing, waiters, notifies, threads]
+
+
+registry = MetricsRegistry()
+registry.add_collector(_collect)
+
+connect_attempts = registry.counter(
+    "psycaio_connect_attempts_total",
+    "Number of connection attempts per host and result",
+    ("host", "port", "result"))
+
+cancel_requests = registry.counter(
+    "psycaio_cancel_requests_total", "Number of server side cancel requests")
+
+
+def render():
+    """ Returns the psycaio metrics in the Prometheus text format.
+
+    The counters are only updated after calling :func:`enable`.
+
+    Example with aiohttp:
+
+    .. code-block:: python
+
+        async def metrics_handler(request):
+            return web.Response(text=psycaio.metrics.render())
+
+    """
+    return registry.render()
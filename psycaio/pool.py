@@ -0,0 +1,131 @@
+from collections import deque
+import threading
+
+from psycopg2 import InterfaceError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from .conn_connect import connect
+from .utils import FairSemaphore
+
+
+class _PooledConnection:
+    """ Async context manager that holds a connection of the pool """
+
+    __slots__ = ("_pool", "_connection")
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._connection = None
+
+    async def __aenter__(self):
+        self._connection = await self._pool.acquire()
+        return self._connection
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        cn = self._connection
+        self._connection = None
+        self._pool.release(cn)
+
+
+class SharedPool:
+    """ Pool of connections that can be shared by multiple event loops and
+    threads.
+
+    At most *size* connections are opened, using *dsn* and the remaining
+    keyword arguments like the :func:`connect <psycaio.connect>` function.
+    Connections are opened when they are needed. Waiting tasks are served in
+    order of arrival, whatever loop they are running in.
+
+    An acquired connection is bound to the event loop of the task that
+    acquired it. It must only be used by that loop until it is released.
+
+    Example:
+
+    .. code-block:: python
+
+        pool = SharedPool(10, "dbname=shop")
+
+        # in any thread with a running loop
+        async with pool.connection() as cn:
+            cr = cn.cursor()
+            await cr.execute("SELECT 1")
+
+    """
+
+    def __init__(self, size, dsn=None, **kwargs):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.size = size
+        self._dsn = dsn
+        self._kwargs = kwargs
+        self._semaphore = FairSemaphore(size)
+        self._idle = deque()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def connection(self):
+        """ Returns an async context manager that acquires a connection and
+        releases it at the end of the block.
+
+        """
+        return _PooledConnection(self)
+
+    async def acquire(self):
+        """ Waits for a connection and returns it. The connection must be
+        released with :meth:`release`.
+
+        """
+        if self._closed:
+            raise InterfaceError("pool already closed")
+        await self._semaphore.acquire()
+        try:
+            while True:
+                with self._lock:
+                    cn = self._idle.popleft() if self._idle else None
+                if cn is None:
+                    return await connect(self._dsn, **self._kwargs)
+                if cn.closed:
+                    continue
+                cn._bind_loop()
+                return cn
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    def release(self, connection):
+        """ Returns a connection to the pool.
+
+        Connections that are closed, or in a transaction, are not reused.
+
+        """
+        try:
+            if connection.closed:
+                return
+            if self._closed or connection._transactions or (
+                    connection.get_transaction_status() !=
+                    TRANSACTION_STATUS_IDLE):
+                connection.close()
+                return
+            with self._lock:
+                self._idle.append(connection)
+        finally:
+            self._semaphore.release()
+
+    def close(self):
+        """ Closes the idle connections. Connections in use are closed when
+        they are released.
+
+        The idle connections might be bound to other loops. This should only
+        be called when those loops are not using the connections anymore.
+
+        """
+        self._closed = True
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for cn in idle:
+            cn.close()
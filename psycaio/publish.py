@@ -0,0 +1,127 @@
+from asyncio import ensure_future, CancelledError
+import logging
+
+from psycopg2 import InterfaceError
+
+from .utils import get_running_loop
+
+logger = logging.getLogger(__name__)
+
+# Default number of seconds messages are collected before they are sent
+WINDOW = 0.005
+
+# Default maximum number of messages sent at once
+MAX_BATCH = 1000
+
+_NOTIFY_QUERY = (
+    "SELECT pg_notify(c, p) FROM unnest(%s::text[], %s::text[]) AS t(c, p)")
+
+
+def _log_error(fut):
+    if not fut.cancelled() and fut.exception() is not None:
+        logger.error("publishing notify failed", exc_info=fut.exception())
+
+
+class NotifyPublisher:
+    """ Sends NOTIFY messages in batches.
+
+    Messages are collected for *window* seconds, or until *max_batch*
+    messages are waiting, and then sent together in a single statement. The
+    messages are sent in the order they were published, so the order per
+    channel is kept.
+
+    Like all messages sent in a single transaction, identical messages in a
+    batch, with the same channel and payload, are delivered only once. If a
+    transaction is active on the connection when a batch is sent, the
+    messages are delivered when that transaction commits.
+
+    This class should not be instantiated directly. Use the
+    :meth:`AioConnMixin.publisher <psycaio.AioConnMixin.publisher>` method
+    instead.
+
+    Example:
+
+    .. code-block:: python
+
+        publisher = cn.publisher()
+        for order in orders:
+            publisher.publish("orders", str(order.id))
+        await publisher.flush()
+
+    """
+
+    def __init__(self, connection, window=WINDOW, max_batch=MAX_BATCH):
+        self.connection = connection
+        self.window = window
+        self.max_batch = max_batch
+        self._channels = []
+        self._payloads = []
+        self._futures = []
+        self._timer = None
+        self._closed = False
+
+    def publish(self, channel, payload=""):
+        """ Adds a message to the batch.
+
+        Returns an :py:class:`asyncio.Future` that is done when the message is
+        sent. It does not need to be awaited. Errors are logged to the
+        ``psycaio.publish`` logger as well.
+
+        """
+        if self._closed:
+            raise InterfaceError("publisher already closed")
+        loop = get_running_loop()
+        fut = loop.create_future()
+        fut.add_done_callback(_log_error)
+        self._channels.append(channel)
+        self._payloads.append(payload)
+        self._futures.append(fut)
+        if len(self._channels) >= self.max_batch:
+            self._send_soon()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._send_soon)
+        return fut
+
+    def _send_soon(self):
+        if self._channels:
+            ensure_future(self._send(False))
+
+    async def _send(self, raise_errors=True):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        channels, payloads, futures = (
+            self._channels, self._payloads, self._futures)
+        if not channels:
+            return
+        self._channels, self._payloads, self._futures = [], [], []
+
+        cr = self.connection.cursor()
+        try:
+            # The execute lock serves the batches in order
+            await cr.execute(_NOTIFY_QUERY, (channels, payloads))
+        except CancelledError:
+            for fut in futures:
+                fut.cancel()
+            raise
+        except Exception as ex:
+            for fut in futures:
+                if not fut.done():
+                    fut.set_exception(ex)
+            if raise_errors:
+                raise
+        else:
+            for fut in futures:
+                if not fut.done():
+                    fut.set_result(None)
+        finally:
+            cr.close()
+
+    async def flush(self):
+        """ Sends the waiting messages now """
+        await self._send()
+
+    async def close(self):
+        """ Sends the waiting messages and stops accepting new ones """
+        self._closed = True
+        await self._send()
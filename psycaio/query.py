@@ -0,0 +1,232 @@
+from collections import OrderedDict
+import re
+import threading
+
+from psycopg2.extensions import adapt, encodings
+
+# Default maximum number of parsed query templates kept
+CACHE_SIZE = 512
+
+# Minimum number of parameters for which the template of a query string is
+# used. With fewer parameters, the C implementation of psycopg2 is faster.
+# See benchmarks/query_merge.py.
+TEMPLATE_MIN_PARAMS = 16
+
+_PLACEHOLDER = re.compile(rb"%(\(([^)]*)\))?(.)", re.S)
+
+
+class _Template:
+    """ Query split in literal parts and placeholders """
+
+    __slots__ = ("parts", "keys", "named")
+
+    def __init__(self, parts, keys, named):
+        self.parts = parts
+        self.keys = keys
+        self.named = named
+
+    def render(self, vars, connection, encoding):  # noqa
+        """ Returns the query with the parameters merged, or None if the
+        parameters do not match.
+
+        """
+        keys = self.keys
+        if self.named:
+            if not isinstance(vars, dict):
+                return None
+            quoted = {}
+            for key in keys:
+                if key not in quoted:
+                    quoted[key] = _quote(vars[key], connection, encoding)
+            quoted = [quoted[key] for key in keys]
+        else:
+            if not isinstance(vars, (tuple, list)) or len(vars) != len(keys):
+                return None
+            quoted = [_quote(value, connection, encoding) for value in vars]
+
+        parts = self.parts
+        result = [parts[0]]
+        for value, part in zip(quoted, parts[1:]):
+            result.append(value)
+            result.append(part)
+        return b"".join(result)
+
+
+def _quote(value, connection, encoding):
+    # same steps as psycopg2 takes for each parameter
+    adapted = adapt(value)
+    prepare = getattr(adapted, "prepare", None)
+    if prepare is not None:
+        prepare(connection)
+    quoted = adapted.getquoted()
+    if isinstance(quoted, str):
+        quoted = quoted.encode(encoding)
+    return quoted
+
+
+def _parse(query):
+    """ Parses a query into a template, or returns None if the query is not
+    a valid template. Invalid queries are left to psycopg2, to report the
+    error.
+
+    """
+    parts = []
+    keys = []
+    named = None
+    literal = []
+    pos = 0
+    for match in _PLACEHOLDER.finditer(query):
+        name_group, name, conversion = match.groups()
+        literal.append(query[pos:match.start()])
+        pos = match.end()
+        if conversion == b"%" and name_group is None:
+            literal.append(b"%")
+            continue
+        if conversion != b"s":
+            return None
+        is_named = name_group is not None
+        if named is None:
+            named = is_named
+        elif named != is_named:
+            return None
+        parts.append(b"".join(literal))
+        literal = []
+        keys.append(name.decode() if is_named else None)
+    tail = query[pos:]
+    if b"%" in tail or not keys:
+        # incomplete placeholder, or nothing to merge
+        return None
+    literal.append(tail)
+    parts.append(b"".join(literal))
+    return _Template(parts, keys, named)
+
+
+_VALUES = re.compile(rb"\bVALUES\s*\(", re.I)
+
+
+def split_values(query):
+    """ Splits an INSERT query in the part before the VALUES group, the group
+    itself and the part after it. Returns None if there is no such group.
+
+    Only quoted literals and identifiers with ``'`` and ``"`` are skipped.
+    Dollar quoted strings, escape strings like ``E'\\''`` and comments are
+    not recognized.
+
+    """
+    match = _VALUES.search(query)
+    if match is None:
+        return None
+    start = match.end() - 1
+    depth = 0
+    pos = start
+    length = len(query)
+    while pos < length:
+        char = query[pos:pos + 1]
+        if char in (b"'", b'"'):
+            # skip quoted literals and identifiers
+            pos = query.find(char, pos + 1)
+            if pos == -1:
+                return None
+        elif char == b"%":
+            if query[pos + 1:pos + 2] == b"(":
+                # skip the name of a placeholder
+                pos = query.find(b")", pos)
+                if pos == -1:
+                    return None
+            else:
+                pos += 1
+        elif char == b"(":
+            depth += 1
+        elif char == b")":
+            depth -= 1
+            if depth == 0:
+                return query[:start], query[start:pos + 1], query[pos + 1:]
+        pos += 1
+    return None
+
+
+class TemplateCache:
+    """ Least recently used cache of parsed query templates """
+
+    def __init__(self, max_size=CACHE_SIZE):
+        self.max_size = max_size
+        self._templates = OrderedDict()
+        # statements can be executed from multiple threads
+        self._lock = threading.Lock()
+
+    def get(self, query, encoding):
+        key = (query, encoding)
+        with self._lock:
+            try:
+                template = self._templates[key]
+            except KeyError:
+                pass
+            else:
+                self._templates.move_to_end(key)
+                return template
+
+        if isinstance(query, str):
+            template = _parse(query.encode(encoding))
+        else:
+            template = _parse(query)
+        with self._lock:
+            self._templates[key] = template
+            if len(self._templates) > self.max_size:
+                self._templates.popitem(last=False)
+        return template
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+
+template_cache = TemplateCache()
+
+
+class Query(str):
+    """ SQL string that is parsed once for all executions.
+
+    A Query can be used everywhere a query string is accepted. When it is
+    executed with parameters, the placeholders are not parsed again, only
+    the parameters are adapted and merged. Other query strings are only
+    merged this way if they have at least
+    :data:`TEMPLATE_MIN_PARAMS <psycaio.query.TEMPLATE_MIN_PARAMS>`
+    parameters, and are kept in a bounded cache. For queries with few
+    parameters, psycopg2 merges them faster.
+
+    Example:
+
+    .. code-block:: python
+
+        insert = Query("INSERT INTO lines (order_id, qty) VALUES (%s, %s)")
+        for line in lines:
+            await cr.execute(insert, line)
+
+    """
+    __module__ = 'psycaio'
+
+    def _get_template(self, encoding):
+        cached = getattr(self, "_template", None)
+        if cached is not None and cached[0] == encoding:
+            return cached[1]
+        template = _parse(self.encode(encoding))
+        self._template = (encoding, template)
+        return template
+
+
+def merge_query(query, vars, connection):  # noqa
+    """ Returns the query with the parameters merged as bytes, or None if
+    psycopg2 should merge them.
+
+    """
+    encoding = encodings.get(connection.encoding, "utf-8")
+    if isinstance(query, Query):
+        template = query._get_template(encoding)
+    elif isinstance(query, (str, bytes)) and (
+            len(vars) >= TEMPLATE_MIN_PARAMS):
+        template = template_cache.get(query, encoding)
+    else:
+        return None
+    if template is None:
+        return None
+    return template.render(vars, connection, encoding)
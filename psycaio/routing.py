@@ -0,0 +1,248 @@
+from asyncio import ensure_future, sleep, gather, Lock, CancelledError
+import logging
+
+from psycopg2 import OperationalError
+from psycopg2.extensions import parse_dsn
+
+from .conn_connect import connect, _merge_service, _split_hosts
+
+logger = logging.getLogger(__name__)
+
+# Arguments of the connect function that are not connection parameters
+_CONNECT_ARGS = (
+    "connection_factory", "cursor_factory", "session_params", "on_connect")
+
+# Recovery state and replication lag in seconds in a single round trip. A
+# standby that replayed everything it received is not lagging, even if the
+# last replayed transaction is old, because the primary may just be idle.
+# The lag is NULL when it can not be determined.
+_STATUS_QUERY = """SELECT pg_is_in_recovery(),
+CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+END"""
+
+
+class _Member:
+    """ Connection and replication state of a single host entry """
+
+    __slots__ = ("entry", "connection", "primary", "lag")
+
+    def __init__(self, entry):
+        self.entry = entry
+        self.connection = None
+        # None as long as the state is unknown
+        self.primary = None
+        self.lag = None
+
+    def usable(self):
+        return self.connection is not None and not self.connection.closed
+
+
+class ReplicaRouter:
+    """ Routes statements to the primary or to a standby server.
+
+    The parameters are the same as for the :func:`connect <psycaio.connect>`
+    function. Multiple hosts can be given, for example with
+    ``host=db1,db2,db3``, and each host entry is connected to separately.
+    The hosts are classified as primary or standby, and the replication lag
+    of the standbys is measured every *refresh_interval* seconds, using
+    ``pg_last_xact_replay_timestamp()``.
+
+    Read-only work is routed to the least lagging standby with a lag of at
+    most *max_lag* seconds. If no standby is eligible, the primary is used.
+    Writes always go to the primary. If no primary is known, the states are
+    refreshed once, after which :exc:`psycopg2.OperationalError` is raised if
+    there is still no primary.
+
+    Use a :meth:`session` to read your own writes.
+
+    The router connects when it is used for the first time, or when it is
+    used as an asynchronous context manager. It must be closed with
+    :meth:`close` when it is no longer needed. Standby detection requires
+    PostgreSQL 10 or higher.
+
+    """
+
+    def __init__(
+            self, dsn=None, max_lag=10.0, refresh_interval=5.0, **kwargs):
+        self.max_lag = max_lag
+        self.refresh_interval = refresh_interval
+
+        conn_kwargs = parse_dsn(dsn) if dsn else {}
+        self._connect_args = {
+            key: kwargs.pop(key) for key in _CONNECT_ARGS if key in kwargs}
+        conn_kwargs.update(kwargs)
+        if _merge_service(conn_kwargs):
+            # libpq will handle the service, so hosts are not known here
+            entries = [(None, None, None)]
+        else:
+            conn_kwargs.pop("service", None)
+            entries = _split_hosts(conn_kwargs)
+        self._conn_kwargs = conn_kwargs
+        self._members = [_Member(entry) for entry in entries]
+
+        self._started = False
+        self._closed = False
+        self._refresh_lock = None
+        self._refresh_task = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    async def start(self):
+        """ Connects to the hosts and starts the periodic refresh """
+        if self._closed:
+            raise OperationalError("router already closed")
+        if self._started:
+            return
+        self._started = True
+        await self.refresh()
+        self._refresh_task = ensure_future(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        while True:
+            await sleep(self.refresh_interval)
+            await self.refresh()
+
+    async def refresh(self):
+        """ Reconnects lost hosts and measures the replication state """
+        if self._refresh_lock is None:
+            self._refresh_lock = Lock()
+        async with self._refresh_lock:
+            await gather(*[
+                self._refresh_member(member) for member in self._members])
+
+    async def _refresh_member(self, member):
+        try:
+            if not member.usable():
+                host, hostaddr, port = member.entry
+                conn_kwargs = dict(self._conn_kwargs)
+                conn_kwargs.update(host=host, hostaddr=hostaddr, port=port)
+                member.connection = await connect(
+                    **self._connect_args, **conn_kwargs)
+            cr = member.connection.cursor()
+            try:
+                await cr.execute(_STATUS_QUERY)
+                in_recovery, lag = cr.fetchone()
+            finally:
+                cr.close()
+        except CancelledError:
+            raise
+        except Exception as ex:
+            logger.warning("host %s unavailable: %s", member.entry, ex)
+            if member.connection is not None:
+                member.connection.close()
+            member.connection = None
+            member.primary = None
+            member.lag = None
+        else:
+            member.primary = not in_recovery
+            member.lag = None if lag is None else float(lag)
+
+    def _primary(self):
+        for member in self._members:
+            if member.primary and member.usable():
+                return member
+        return None
+
+    def _standby(self):
+        best = None
+        for member in self._members:
+            if (member.primary is False and member.lag is not None and
+                    member.lag <= self.max_lag and member.usable() and
+                    (best is None or member.lag < best.lag)):
+                best = member
+        return best
+
+    async def connection(self, readonly=False):
+        """ Returns a connection for read-only or for read-write work.
+
+        The connection is shared with other users of the router and must not
+        be closed.
+
+        """
+        if not self._started:
+            await self.start()
+        elif self._closed:
+            raise OperationalError("router already closed")
+        if readonly:
+            member = self._standby()
+            if member is not None:
+                return member.connection
+        member = self._primary()
+        if member is None:
+            await self.refresh()
+            member = self._primary()
+            if member is None:
+                raise OperationalError("no primary server available")
+        return member.connection
+
+    async def cursor(self, readonly=False, *args, **kwargs):
+        """ Returns a new cursor of a connection returned by
+        :meth:`connection`. Other arguments are passed to the cursor method
+        of the connection.
+
+        """
+        cn = await self.connection(readonly)
+        return cn.cursor(*args, **kwargs)
+
+    def session(self):
+        """ Returns a :class:`RouterSession <psycaio.routing.RouterSession>`
+        for read-your-writes consistency. """
+        return RouterSession(self)
+
+    def lags(self):
+        """ Returns a dictionary of standby host entries and their last
+        measured lag in seconds, or None if the lag is unknown. """
+        return {
+            member.entry: member.lag for member in self._members
+            if member.primary is False}
+
+    def close(self):
+        """ Stops the refresh and closes all connections """
+        self._closed = True
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        for member in self._members:
+            if member.connection is not None:
+                member.connection.close()
+                member.connection = None
+
+
+class RouterSession:
+    """ Sequence of work that must see its own writes.
+
+    Read-only work is routed like by the router, until the first read-write
+    connection is requested. After that, all work of the session is routed to
+    the primary, because a standby might not have replayed the writes yet.
+
+    """
+
+    def __init__(self, router):
+        self.router = router
+        self.wrote = False
+
+    async def connection(self, readonly=False):
+        """ Returns a connection, see
+        :meth:`ReplicaRouter.connection
+        <psycaio.routing.ReplicaRouter.connection>` """
+        if not readonly:
+            self.wrote = True
+        return await self.router.connection(readonly and not self.wrote)
+
+    async def cursor(self, readonly=False, *args, **kwargs):
+        """ Returns a new cursor of a connection returned by
+        :meth:`connection`. """
+        cn = await self.connection(readonly)
+        return cn.cursor(*args, **kwargs)
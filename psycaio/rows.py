@@ -0,0 +1,156 @@
+from psycopg2.extensions import (
+    cursor as PGCursor, new_type, register_type, string_types)
+
+from .cursor import AioCursorMixin
+
+# Types that are relatively expensive to convert, and are therefore
+# converted on access. Cheap types, like integers and text, are converted by
+# psycopg2 as usual.
+LAZY_OIDS = (
+    114,    # json
+    199,    # json[]
+    1000,   # bool[]
+    1005,   # int2[]
+    1007,   # int4[]
+    1009,   # text[]
+    1015,   # varchar[]
+    1016,   # int8[]
+    1021,   # float4[]
+    1022,   # float8[]
+    1082,   # date
+    1083,   # time
+    1114,   # timestamp
+    1115,   # timestamp[]
+    1182,   # date[]
+    1183,   # time[]
+    1184,   # timestamptz
+    1185,   # timestamptz[]
+    1186,   # interval
+    1187,   # interval[]
+    1231,   # numeric[]
+    1266,   # timetz
+    1270,   # timetz[]
+    1700,   # numeric
+    3802,   # jsonb
+    3807,   # jsonb[]
+)
+
+
+_LAZY_OIDS = frozenset(LAZY_OIDS)
+
+
+def _keep_raw(value, cursor):
+    return value
+
+
+_RAW = new_type(LAZY_OIDS, "PSYCAIO_RAW", _keep_raw)
+
+
+class LazyRow:
+    """ Row that converts a value when it is accessed for the first time.
+
+    Values of the types in :data:`LAZY_OIDS <psycaio.rows.LAZY_OIDS>` are
+    kept as the text received from the server until they are accessed. The
+    converted value is remembered. Other values are converted by psycopg2 as
+    usual.
+
+    Rows can be indexed, sliced and iterated like tuples, and compare equal
+    to tuples with the same values.
+
+    """
+
+    __slots__ = ("_cursor", "_values", "_casters")
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        casters = cursor._get_casters()
+        self._values = [None] * len(casters)
+        # copied, because the caster is removed after conversion
+        self._casters = list(casters)
+
+    def __setitem__(self, index, value):
+        # used by psycopg2 to fill the row
+        self._values[index] = value
+
+    def _get(self, index):
+        caster = self._casters[index]
+        if caster is None:
+            return self._values[index]
+        value = self._values[index]
+        if value is not None:
+            value = self._values[index] = caster(value, self._cursor)
+        self._casters[index] = None
+        return value
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(
+                self._get(i) for i in range(*index.indices(len(self._values))))
+        if index < 0:
+            index += len(self._values)
+        return self._get(index)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        for index in range(len(self._values)):
+            yield self._get(index)
+
+    def __eq__(self, other):
+        if isinstance(other, LazyRow):
+            other = tuple(other)
+        return tuple(self) == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"LazyRow{tuple(self)!r}"
+
+
+class AioLazyCursor(AioCursorMixin, PGCursor):
+    """ Cursor that returns :class:`LazyRow <psycaio.rows.LazyRow>` objects.
+
+    This is useful for wide rows, of which only some values are used. Types
+    registered with this cursor as scope, for the types in
+    :data:`LAZY_OIDS <psycaio.rows.LAZY_OIDS>`, are replaced. Types
+    registered with the connection or globally are used for the conversion.
+
+    Example:
+
+    .. code-block:: python
+
+        cr = cn.cursor(cursor_factory=AioLazyCursor)
+        await cr.execute("SELECT * FROM wide_table")
+        for row in cr:
+            print(row[0])
+
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        register_type(_RAW, self)
+        self.row_factory = LazyRow
+        self._casters_description = None
+        self._casters = None
+
+    def _get_casters(self):
+        """ Returns the conversion function for each column, or None if
+        psycopg2 converted the value already.
+
+        """
+        description = self.description
+        if description is not self._casters_description:
+            connection_types = self.connection.string_types
+            casters = []
+            for column in description:
+                oid = column[1]
+                if oid in _LAZY_OIDS:
+                    caster = (
+                        connection_types.get(oid) or string_types.get(oid))
+                else:
+                    caster = None
+                casters.append(caster)
+            self._casters = casters
+            self._casters_description = description
+        return self._casters
@@ -0,0 +1,96 @@
+import os
+import threading
+
+from psycopg2 import OperationalError
+
+# Parsed service files by path. Values are tuples of modification time and
+# the parsed services.
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _parse_service_file(path):
+    """ Parses a connection service file into a dictionary of services """
+    services = {}
+    params = None
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('['):
+                if not line.endswith(']'):
+                    raise OperationalError(
+                        f'syntax error in service file "{path}", line '
+                        f'{line_no}')
+                # first definition wins, just like libpq
+                params = services.setdefault(line[1:-1], {})
+                continue
+            key, sep, value = line.partition('=')
+            key = key.strip()
+            if not sep or not key:
+                raise OperationalError(
+                    f'syntax error in service file "{path}", line {line_no}')
+            if params is None:
+                # parameters outside of a service section are ignored
+                continue
+            if key == "service":
+                raise OperationalError(
+                    f'nested service specifications not supported in service '
+                    f'file "{path}", line {line_no}')
+            params[key] = value.strip()
+    return services
+
+
+def _get_services(path):
+    """ Returns the services of a file, or None if it does not exist.
+
+    The parsed file is cached until its modification time changes.
+
+    """
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    services = _parse_service_file(path)
+    with _cache_lock:
+        _cache[path] = (mtime, services)
+    return services
+
+
+def _service_files():
+    """ Yields the service file locations, in the order used by libpq """
+    path = os.environ.get("PGSERVICEFILE")
+    if path:
+        yield path
+    elif os.name == "nt":
+        appdata = os.environ.get("APPDATA")
+        if appdata:
+            yield os.path.join(appdata, "postgresql", ".pg_service.conf")
+    else:
+        yield os.path.expanduser("~/.pg_service.conf")
+
+    # The compiled in default of libpq for the system wide location is not
+    # known here. Only use the environment variable.
+    sysconfdir = os.environ.get("PGSYSCONFDIR")
+    if sysconfdir:
+        yield os.path.join(sysconfdir, "pg_service.conf")
+
+
+def get_service_params(name):
+    """ Returns the connection parameters for a service.
+
+    The files are searched in the same locations as libpq does. The result is
+    None when the service can not be found, for example because it is defined
+    in the system wide file of which the location is only known by libpq.
+
+    """
+    for path in _service_files():
+        services = _get_services(path)
+        if services is not None and name in services:
+            return services[name]
+    return None
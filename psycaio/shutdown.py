@@ -0,0 +1,33 @@
+from asyncio import gather
+
+from .utils import get_running_loop, join_threads, selector_pool
+
+
+async def shutdown(connections=(), timeout=None):
+    """Drain and close connections, then stop the idle selector threads.
+
+    The *connections* are drained concurrently with
+    :meth:`AioConnMixin.drain <psycaio.AioConnMixin.drain>`, so they finish
+    their running work before they are closed. The *timeout* is the number of
+    seconds for the entire shutdown.
+
+    Selector threads are only used with a proactor event loop. Threads that
+    are still in use by other connections keep running.
+
+    Example:
+
+    .. code-block:: python
+
+        await psycaio.shutdown(connections, timeout=30)
+
+    """
+    loop = get_running_loop()
+    start = loop.time()
+    await gather(*[cn.drain(timeout) for cn in connections])
+    if timeout is not None:
+        timeout = max(0, timeout - (loop.time() - start))
+
+    # The idle threads are picked here, so no connection of this loop gets
+    # one of them. Joining blocks, so use a worker thread for that.
+    idle = selector_pool.stop_idle()
+    await loop.run_in_executor(None, join_threads, idle, timeout)
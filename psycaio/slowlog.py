@@ -0,0 +1,127 @@
+from asyncio import ensure_future
+import logging
+from random import random
+from time import monotonic
+
+from .conn_connect import connect
+from .fingerprint import normalize, fingerprint
+from .hooks import add_statement_listener, remove_statement_listener
+
+logger = logging.getLogger(__name__)
+
+# Statements that can be explained
+_EXPLAINABLE = (
+    "select", "insert", "update", "delete", "with", "values", "table",
+    "merge")
+
+
+class SlowQueryLog:
+    """ Logs statements that take longer than *threshold* seconds.
+
+    Of the slow statements, a fraction of *sample_rate* is logged as a
+    warning to the ``psycaio.slowlog`` logger, or the given *logger*. The log
+    record contains a ``slow_query`` attribute with a dictionary with the
+    fingerprint and normalized text of the query, the number of parameters,
+    the size of the statement in bytes, the duration, the time spent waiting
+    for the connection, the host and port, and the exception class name if
+    the statement failed.
+
+    If *explain_dsn* is set, the plan of a logged statement is retrieved
+    with EXPLAIN (without ANALYZE) on a separate connection using that DSN,
+    and logged as well. At most one plan is retrieved at a time, and at most
+    one per *explain_interval* seconds. Query strings with multiple
+    statements are not explained.
+
+    The log is active after calling :meth:`enable`.
+
+    Example:
+
+    .. code-block:: python
+
+        slow_log = SlowQueryLog(threshold=0.5, sample_rate=0.1)
+        slow_log.enable()
+
+    """
+
+    def __init__(
+            self, threshold=1.0, sample_rate=1.0, explain_dsn=None,
+            explain_interval=60.0, logger=logger):
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.explain_dsn = explain_dsn
+        self.explain_interval = explain_interval
+        self.logger = logger
+        self._last_explain = None
+        self._explain_task = None
+
+    def enable(self):
+        """ Starts logging slow statements """
+        add_statement_listener(self)
+
+    def disable(self):
+        """ Stops logging slow statements """
+        remove_statement_listener(self)
+
+    def __call__(self, cursor, query, vars, lock_wait, duration, error):  # noqa
+        if duration < self.threshold:
+            return
+        if self.sample_rate < 1 and random() >= self.sample_rate:
+            return
+
+        if not isinstance(query, (str, bytes)):
+            # a psycopg2.sql object
+            query = query.as_string(cursor)
+        dsn_params = cursor.connection.get_dsn_parameters()
+        record = {
+            "fingerprint": fingerprint(query),
+            "query": normalize(query),
+            "num_params": len(vars) if vars else 0,
+            "query_size": len(cursor.query or b""),
+            "duration": duration,
+            "lock_wait": lock_wait,
+            "host": dsn_params.get("host") or dsn_params.get("hostaddr"),
+            "port": dsn_params.get("port"),
+            "error": None if error is None else type(error).__name__,
+        }
+        self.logger.warning(
+            "slow query %s (%.3f s): %s", record["fingerprint"], duration,
+            record["query"], extra={"slow_query": record})
+
+        if error is None and self._may_explain(query):
+            self._last_explain = monotonic()
+            self._explain_task = ensure_future(
+                self._explain(cursor.mogrify(query, vars), record))
+
+    def _may_explain(self, query):
+        if self.explain_dsn is None:
+            return False
+        if self._explain_task is not None and not self._explain_task.done():
+            return False
+        if (self._last_explain is not None and
+                monotonic() - self._last_explain < self.explain_interval):
+            return False
+        text = normalize(query).rstrip("; ")
+        if ";" in text:
+            # EXPLAIN only applies to the first statement, the others would
+            # be executed again
+            return False
+        words = text.split(None, 1)
+        return bool(words) and words[0].lower() in _EXPLAINABLE
+
+    async def _explain(self, statement, record):
+        try:
+            cn = await connect(self.explain_dsn)
+            try:
+                cr = cn.cursor()
+                await cr.execute(b"EXPLAIN " + statement)
+                plan = "\n".join(row[0] for row in cr.fetchall())
+            finally:
+                cn.close()
+        except Exception as ex:
+            self.logger.debug(
+                "could not explain slow query %s: %s", record["fingerprint"],
+                ex)
+            return
+        self.logger.warning(
+            "plan of slow query %s:\n%s", record["fingerprint"], plan,
+            extra={"slow_query": record, "plan": plan})
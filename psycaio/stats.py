@@ -0,0 +1,129 @@
+from collections import OrderedDict
+import threading
+
+from .fingerprint import normalize, fingerprint
+from .hooks import add_statement_listener, remove_statement_listener
+
+# Default maximum number of fingerprints kept
+MAX_ENTRIES = 1000
+
+
+class _Entry:
+    """ Counters of a single fingerprint """
+
+    __slots__ = (
+        "query", "calls", "errors", "rows", "total_time", "min_time",
+        "max_time")
+
+    def __init__(self, query):
+        self.query = query
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_time = 0.0
+        self.min_time = None
+        self.max_time = 0.0
+
+    def as_dict(self):
+        return {
+            "query": self.query,
+            "calls": self.calls,
+            "errors": self.errors,
+            "rows": self.rows,
+            "total_time": self.total_time,
+            "min_time": self.min_time,
+            "max_time": self.max_time,
+            "mean_time": self.total_time / self.calls if self.calls else None,
+        }
+
+
+class StatementStats:
+    """ Aggregates statistics per query fingerprint, much like the
+    pg_stat_statements extension does server side.
+
+    For each fingerprint the normalized query text, the number of calls and
+    errors, the number of rows, and the total, minimum and maximum execution
+    time are kept. At most *max_entries* fingerprints are kept. When that
+    limit is reached, the least recently used fingerprint is discarded.
+
+    The statistics are collected after calling :meth:`enable`.
+
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # statements can be executed from multiple threads
+        self._lock = threading.Lock()
+        # Cache of query text to fingerprint. Queries are mostly string
+        # constants, so this saves normalizing the same text over and over.
+        self._fingerprints = {}
+
+    def enable(self):
+        """ Starts collecting statistics """
+        add_statement_listener(self)
+
+    def disable(self):
+        """ Stops collecting statistics """
+        remove_statement_listener(self)
+
+    def _fingerprint(self, query):
+        try:
+            return self._fingerprints[query]
+        except KeyError:
+            pass
+        except TypeError:
+            # not hashable
+            return fingerprint(query), normalize(query)
+        result = fingerprint(query), normalize(query)
+        if len(self._fingerprints) >= self.max_entries:
+            self._fingerprints.clear()
+        self._fingerprints[query] = result
+        return result
+
+    def __call__(self, cursor, query, vars, lock_wait, duration, error):  # noqa
+        if not isinstance(query, (str, bytes)):
+            # a psycopg2.sql object
+            query = query.as_string(cursor)
+        key, text = self._fingerprint(query)
+        rows = cursor.rowcount if error is None else 0
+
+        with self._lock:
+            entries = self._entries
+            entry = entries.get(key)
+            if entry is None:
+                entry = entries[key] = _Entry(text)
+                if len(entries) > self.max_entries:
+                    entries.popitem(last=False)
+            else:
+                entries.move_to_end(key)
+            entry.calls += 1
+            if error is not None:
+                entry.errors += 1
+            if rows > 0:
+                entry.rows += rows
+            entry.total_time += duration
+            if entry.min_time is None or duration < entry.min_time:
+                entry.min_time = duration
+            if duration > entry.max_time:
+                entry.max_time = duration
+
+    async def snapshot(self, reset=False):
+        """ Returns the statistics as a dictionary of fingerprints and
+        dictionaries of counters.
+
+        If *reset* is True, the statistics are cleared at the same time, so
+        no statement gets lost between taking a snapshot and resetting.
+
+        """
+        with self._lock:
+            snapshot = {
+                key: entry.as_dict() for key, entry in self._entries.items()}
+            if reset:
+                self._entries.clear()
+        return snapshot
+
+    async def reset(self):
+        """ Clears the statistics """
+        with self._lock:
+            self._entries.clear()
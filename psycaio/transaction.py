@@ -0,0 +1,86 @@
+from psycopg2 import InternalError, ProgrammingError
+from psycopg2.extensions import TRANSACTION_STATUS_INERROR
+
+
+class Transaction:
+    """ Asynchronous context manager for a transaction or a savepoint.
+
+    This class should not be instantiated directly. Use the
+    :meth:`AioConnMixin.transaction <psycaio.AioConnMixin.transaction>` method
+    instead.
+
+    """
+    __module__ = 'psycaio'
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.savepoint = None
+        self._start_sql = None
+        # set when the start statement is actually sent to the server
+        self._started = False
+
+    async def __aenter__(self):
+        cn = self.connection
+        stack = cn._transactions
+        if stack is None:
+            stack = cn._transactions = []
+        if stack:
+            self.savepoint = f"psycaio_savepoint_{len(stack)}"
+            self._start_sql = f"SAVEPOINT {self.savepoint}"
+        else:
+            if cn._status_in_transaction():
+                raise ProgrammingError(
+                    "a transaction is already in progress")
+            self._start_sql = "BEGIN"
+
+        # The start statement is sent together with the first statement in
+        # the transaction.
+        stack.append(self)
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        stack = self.connection._transactions
+        if not stack or stack[-1] is not self:
+            raise ProgrammingError(
+                "transactions must be ended in reverse order")
+        stack.pop()
+
+        if not self._started:
+            # Nothing was executed in this transaction, so there is nothing to
+            # finish either.
+            return
+
+        cn = self.connection
+        savepoint = self.savepoint
+        if exc_type is None:
+            if savepoint is None:
+                # A COMMIT of an aborted transaction is turned into a
+                # ROLLBACK by the server, without an error
+                if cn.get_transaction_status() == TRANSACTION_STATUS_INERROR:
+                    sql = "ROLLBACK"
+                else:
+                    sql = "COMMIT"
+            else:
+                sql = f"RELEASE SAVEPOINT {savepoint}"
+        else:
+            # This includes cancellation. A cancelled statement is already
+            # cancelled server side at this point. If the SAVEPOINT was
+            # rejected together with the first statement of the block, this
+            # fails because the savepoint does not exist, and the enclosing
+            # transaction remains aborted.
+            if savepoint is None:
+                sql = "ROLLBACK"
+            else:
+                sql = (
+                    f"ROLLBACK TO SAVEPOINT {savepoint};"
+                    f"RELEASE SAVEPOINT {savepoint}")
+
+        cr = cn.cursor()
+        try:
+            await cr.execute(sql)
+            if exc_type is None and cr.statusmessage == "ROLLBACK":
+                raise InternalError(
+                    "transaction aborted by an earlier error, rolled back "
+                    "instead of committed")
+        finally:
+            cr.close()
@@ -4,7 +4,12 @@ try:
 except ImportError:  # pragma: no cover
     from asyncio import get_event_loop as get_running_loop  # noqa
 
+from collections import deque
+import os
 import threading
+import weakref
+
+from .watchdog import blocking_section
 
 MAX_FILENO = 60
 
@@ -12,9 +17,11 @@ MAX_FILENO = 60
 class SelectorThread(threading.Thread):
     """ Thread with a running selector event loop """
 
-    def __init__(self, condition):
+    def __init__(self, condition, lock):
         super().__init__(daemon=True)
         self.condition = condition
+        # the lock of the pool, which guards num
+        self.lock = lock
         self.num = 1
 
     def run(self):
@@ -24,31 +31,191 @@ class SelectorThread(threading.Thread):
             # notify pool we're ready
             self.condition.notify()
         self.loop.run_forever()
+        self.loop.close()
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
 
     def decrement(self):
-        self.num -= 1
+        with self.lock:
+            self.num -= 1
 
 
 class SelectorPool():
 
     def __init__(self):
         self.threads = []
+        self.pid = os.getpid()
+        # Connections of multiple event loops can use the pool, and
+        # stop_idle may run concurrently
+        self.lock = threading.Lock()
 
     def get_thread(self):
-        for thread in self.threads:
-            if thread.num < MAX_FILENO:
-                thread.num += 1
-                return thread
-
-        # no available thread, create one
-        condition = threading.Condition()
-        with condition:
-            thread = SelectorThread(condition)
-            thread.start()
-            # wait until loop is set up
-            condition.wait()
-        self.threads.append(thread)
-        return thread
+        with self.lock:
+            if self.pid != os.getpid():
+                # Forked. Only the forking thread survives, the selector
+                # threads of the parent are gone.
+                self.threads = []
+                self.pid = os.getpid()
+            for thread in self.threads:
+                if thread.num < MAX_FILENO:
+                    thread.num += 1
+                    return thread
+
+            # no available thread, create one
+            condition = threading.Condition()
+            with blocking_section("thread_start"), condition:
+                thread = SelectorThread(condition, self.lock)
+                thread.start()
+                # wait until loop is set up
+                condition.wait()
+            self.threads.append(thread)
+            return thread
+
+    def stop_idle(self):
+        """ Stops the threads that are not in use and returns them.
+
+        The threads are removed from the pool first, so they are not handed
+        out anymore.
+
+        """
+        with self.lock:
+            idle = [thread for thread in self.threads if thread.num == 0]
+            self.threads = [thread for thread in self.threads if thread.num]
+        for thread in idle:
+            thread.stop()
+        return idle
+
+    def shutdown(self, timeout=None):
+        """ Stops and joins the threads that are not in use.
+
+        Returns the number of threads that are still in use. Those keep
+        running, and can be stopped by a later call.
+
+        """
+        join_threads(self.stop_idle(), timeout)
+        return len(self.threads)
+
+
+def join_threads(threads, timeout=None):
+    """ Joins the threads, waiting at most *timeout* seconds for each """
+    for thread in threads:
+        thread.join(timeout)
 
 
 selector_pool = SelectorPool()
+
+# Live connections, to detach them in a forked child and for the metrics
+_connections = weakref.WeakSet()
+
+
+def register_connection(connection):
+    """ Registers a connection to be detached from its socket in a forked
+    child process.
+
+    """
+    _connections.add(connection)
+
+
+def get_connections():
+    """ Returns a list of the connections that are not garbage collected """
+    while True:
+        try:
+            return list(_connections)
+        except RuntimeError:
+            # changed by another thread while copying
+            continue
+
+
+def _after_fork_in_child():
+    # the lock may have been held by another thread of the parent
+    selector_pool.lock = threading.Lock()
+    selector_pool.threads = []
+    selector_pool.pid = os.getpid()
+
+    # The child shares the sockets with the parent. Closing or collecting an
+    # inherited connection would terminate the session of the parent, so
+    # redirect the socket of the child to the null device.
+    devnull = os.open(os.devnull, os.O_RDWR)
+    try:
+        for connection in list(_connections):
+            try:
+                fd = connection.fileno()
+            except Exception:
+                # already closed
+                continue
+            os.dup2(devnull, fd)
+    finally:
+        os.close(devnull)
+    _connections.clear()
+
+
+_register_at_fork = getattr(os, "register_at_fork", None)
+if _register_at_fork is not None:
+    _register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def _wake(fut):
+    if not fut.done():
+        fut.set_result(None)
+
+
+class FairSemaphore:
+    """ Semaphore that can be shared by multiple threads and event loops.
+
+    Waiters are served strictly in order of arrival. A released permit is
+    handed over directly to the next waiter, so a newly arriving coroutine
+    can not overtake waiting ones.
+
+    """
+
+    def __init__(self, value):
+        self._value = value
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    def locked(self):
+        """ Returns True if a permit can not be acquired immediately """
+        return self._value == 0 or bool(self._waiters)
+
+    async def acquire(self):
+        with self._lock:
+            if self._value > 0 and not self._waiters:
+                self._value -= 1
+                return
+            loop = get_running_loop()
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    # Too late, the permit was already handed over. Pass it
+                    # on.
+                    granted = True
+                else:
+                    granted = False
+            if granted:
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            if not self._waiters:
+                self._value += 1
+                return
+            loop, fut = self._waiters.popleft()
+        try:
+            loop.call_soon_threadsafe(_wake, fut)
+        except RuntimeError:
+            # loop of the waiter is closed, try the next one
+            self.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.release()
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+from time import monotonic
+import threading
+
+from .utils import get_running_loop
+
+logger = logging.getLogger(__name__)
+
+# The active watchdog, if any
+_active = None
+
+
+class _NullSection:
+    """ Section context manager that does nothing """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_null_section = _NullSection()
+
+
+class _Section:
+    """ Section context manager that measures the time spent """
+
+    __slots__ = ("_watchdog", "_name", "_start")
+
+    def __init__(self, watchdog, name):
+        self._watchdog = watchdog
+        self._name = name
+
+    def __enter__(self):
+        self._start = monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._watchdog.record(self._name, monotonic() - self._start)
+
+
+def blocking_section(name):
+    """ Returns a context manager for a section of code that blocks the
+    calling thread.
+
+    When a :class:`Watchdog <psycaio.watchdog.Watchdog>` is enabled, the time
+    spent in the section is recorded. Otherwise this is a no-op.
+
+    """
+    watchdog = _active
+    if watchdog is None:
+        return _null_section
+    return _Section(watchdog, name)
+
+
+class Watchdog:
+    """ Measures the time spent in sections of psycaio that block the event
+    loop, and the lag of the event loop itself.
+
+    The blocking sections are:
+
+    * ``pg_connect``: creating the connection by libpq in
+      :func:`connect <psycaio.connect>`. This includes DNS lookups, when those
+      could not be performed asynchronously.
+
+    * ``thread_call``: waiting for a call in the selector thread, when the
+      connection is used from a proactor loop.
+
+    * ``thread_start``: starting a new selector thread.
+
+    Each section that takes *threshold* seconds or more is logged as a
+    warning to the ``psycaio.watchdog`` logger. Statistics are available with
+    :meth:`snapshot`.
+
+    The watchdog is active after calling :meth:`enable`. The event loop lag
+    is measured while the :meth:`monitor` coroutine runs.
+
+    """
+
+    def __init__(self, threshold=0.01):
+        self.threshold = threshold
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        """ Starts measuring the blocking sections """
+        global _active
+        _active = self
+
+    def disable(self):
+        """ Stops measuring the blocking sections """
+        global _active
+        if _active is self:
+            _active = None
+
+    def record(self, name, duration):
+        """ Records the duration of a section """
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = [0, 0.0, 0.0]
+            stats[0] += 1
+            stats[1] += duration
+            if duration > stats[2]:
+                stats[2] = duration
+        if duration >= self.threshold:
+            logger.warning(
+                "%s blocked for %.3f s", name, duration,
+                extra={"section": name, "duration": duration})
+
+    async def monitor(self, interval=0.1):
+        """ Measures the event loop lag, until cancelled.
+
+        Every *interval* seconds, the difference between the scheduled and
+        the actual wake up time is recorded as ``loop_lag``.
+
+        """
+        loop = get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            self.record("loop_lag", max(0, loop.time() - start - interval))
+
+    def snapshot(self, reset=False):
+        """ Returns a dictionary of section names and dictionaries with the
+        count, total and maximum duration.
+
+        """
+        with self._lock:
+            snapshot = {
+                name: {"count": count, "total": total, "max": max_}
+                for name, (count, total, max_) in self._stats.items()}
+            if reset:
+                self._stats.clear()
+        return snapshot
@@ -0,0 +1,54 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+
+def _run_worker(main, index, args):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(main(index, *args))
+    finally:
+        try:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+
+
+def run_workers(main, processes=None, args=()):
+    """Run an event loop in each of a number of worker processes.
+
+    The coroutine function *main* is called in every worker as
+    ``main(index, *args)``, where *index* is the number of the worker,
+    starting at 0. It should open its own connections, for example a shard of
+    the work selected by *index*. The number of workers defaults to the
+    number of CPU cores.
+
+    This function blocks until all workers are done and returns a list of the
+    results of *main*, in order of *index*. If a worker raises an exception,
+    it is raised here. The *main* function and *args* must be picklable.
+
+    Connections opened in the parent process can not be used by the workers.
+    When the workers are forked, the selector threads of the parent are not
+    used either.
+
+    Example:
+
+    .. code-block:: python
+
+        async def main(index, dsn):
+            cn = await psycaio.connect(dsn)
+            ...
+
+        if __name__ == "__main__":
+            run_workers(main, args=("dbname=shop",))
+
+    """
+    if processes is None:
+        processes = os.cpu_count() or 1
+    with ProcessPoolExecutor(processes) as executor:
+        futures = [
+            executor.submit(_run_worker, main, index, args)
+            for index in range(processes)]
+        return [future.result() for future in futures]
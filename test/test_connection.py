@@ -1,7 +1,9 @@
+import asyncio
 from asyncio import TimeoutError, wait_for
 import os
 import tempfile
 import sys
+from unittest import skipUnless
 
 try:
     from unittest import IsolatedAsyncioTestCase
@@ -11,7 +13,10 @@ except ImportError:
 from psycopg2 import OperationalError, ProgrammingError, InterfaceError
 from psycopg2.extensions import connection
 
-from psycaio import connect, AioConnection, AioConnMixin
+from psycaio import (
+    connect, warm_up, shutdown, AioConnection, AioConnMixin)
+from psycaio.limits import connect_limiter
+from psycaio.utils import selector_pool
 
 from .loops import loop_classes
 
@@ -23,6 +28,22 @@ class ConnTestCase(IsolatedAsyncioTestCase):
         self.assertIsInstance(cn, AioConnection)
         self.assertEqual(sys.getrefcount(cn), 2)
 
+    async def test_lazy_state(self):
+        cn = await connect(dbname='postgres')
+        self.assertIsNone(cn._lock)
+        self.assertIsInstance(cn.notifies, list)
+
+        cr = cn.cursor()
+        await cr.execute("LISTEN lazy")
+        await cr.execute("NOTIFY lazy, 'hi'")
+        self.assertIsNotNone(cn._lock)
+        self.assertEqual(cn.notifies[0].payload, 'hi')
+
+        # received notifies are moved to the queue
+        notify = await cn.get_notify()
+        self.assertEqual(notify.payload, 'hi')
+        self.assertNotIsInstance(cn.notifies, list)
+
     async def test_connect_dsn(self):
         cn = await connect('dbname=postgres')
         self.assertIsInstance(cn, AioConnection)
@@ -68,6 +89,24 @@ class ConnTestCase(IsolatedAsyncioTestCase):
         del os.environ["PGSERVICEFILE"]
         os.unlink(service_file.name)
 
+    async def test_service_file_host(self):
+        service_file = tempfile.NamedTemporaryFile('w', delete=False)
+        service_file.write(
+            "[test]\ndbname=postgres\nhost=localhost\nport=2345\n")
+        service_file.close()
+        os.environ["PGSERVICEFILE"] = service_file.name
+        try:
+            # explicit parameters take precedence
+            cn = await connect(service="test", port="5432")
+            self.assertIsInstance(cn, AioConnection)
+            self.assertEqual(cn.get_dsn_parameters()["host"], "localhost")
+
+            with self.assertRaises(OperationalError):
+                await connect(service="test")
+        finally:
+            del os.environ["PGSERVICEFILE"]
+            os.unlink(service_file.name)
+
     async def test_environ_port(self):
         os.environ["PGPORT"] = "5432"
         cn = await connect(dbname="postgres")
@@ -112,6 +151,115 @@ class ConnTestCase(IsolatedAsyncioTestCase):
         with self.assertRaises(OperationalError):
             await cn.cursor().execute("SELECT 42")
 
+    async def test_warm_up(self):
+        connect_limiter.configure(max_concurrent=2)
+        try:
+            results = await warm_up(4, dbname="postgres")
+        finally:
+            connect_limiter.configure()
+        self.assertEqual(len(results), 4)
+        for cn, latency in results:
+            self.assertIsInstance(cn, AioConnection)
+            self.assertGreater(latency, 0)
+            cn.close()
+
+        with self.assertRaises(OperationalError):
+            await warm_up(2, dbname="postgres", port="2345")
+
+    async def test_session_init(self):
+        cn = await connect(
+            dbname="postgres",
+            session_params={
+                "search_path": "pg_catalog, public",
+                "application_name": "psycaio test"},
+            on_connect=[
+                "SET lock_timeout = 1000", "CREATE TEMP TABLE init (i int)"])
+        cr = cn.cursor()
+        await cr.execute("SHOW search_path")
+        self.assertEqual(cr.fetchone()[0], "pg_catalog, public")
+        await cr.execute("SHOW application_name")
+        self.assertEqual(cr.fetchone()[0], "psycaio test")
+        await cr.execute("SHOW lock_timeout")
+        self.assertEqual(cr.fetchone()[0], "1s")
+        await cr.execute("SELECT * FROM init")
+        cn.close()
+
+    async def test_session_init_error(self):
+        with self.assertRaises(ProgrammingError):
+            await connect(dbname="postgres", on_connect="SELECT * FROM nope")
+
+    async def test_drain(self):
+        cn = await connect(dbname="postgres")
+        cr = cn.cursor()
+        running = asyncio.ensure_future(cr.execute("SELECT pg_sleep(0.2)"))
+        queued = asyncio.ensure_future(cn.cursor().execute("SELECT 1"))
+        await asyncio.sleep(0.05)
+        drain = asyncio.ensure_future(cn.drain())
+        await asyncio.sleep(0)
+        self.assertTrue(cn.draining)
+        with self.assertRaises(InterfaceError):
+            await cn.cursor().execute("SELECT 2")
+        await running
+        await queued
+        await drain
+        self.assertTrue(cn.closed)
+
+    async def test_drain_transaction(self):
+        cn = await connect(dbname="postgres")
+        cr = cn.cursor()
+        async with cn.transaction():
+            await cr.execute("SELECT 1")
+            drain = asyncio.ensure_future(cn.drain())
+            await asyncio.sleep(0.1)
+            # the running transaction may finish
+            await cr.execute("SELECT 2")
+            self.assertFalse(cn.closed)
+        await drain
+        self.assertTrue(cn.closed)
+
+    async def test_drain_timeout(self):
+        cn = await connect(dbname="postgres")
+        task = asyncio.ensure_future(
+            cn.cursor().execute("SELECT pg_sleep(10)"))
+        await asyncio.sleep(0.05)
+        queued = asyncio.ensure_future(cn.cursor().execute("SELECT 1"))
+        await asyncio.sleep(0.05)
+        await cn.drain(0.1)
+        self.assertTrue(cn.closed)
+        with self.assertRaises(InterfaceError):
+            await asyncio.wait_for(task, 1)
+        with self.assertRaises(InterfaceError):
+            await asyncio.wait_for(queued, 1)
+
+    async def test_shutdown(self):
+        cns = [await connect(dbname="postgres") for _ in range(2)]
+        await shutdown(cns, timeout=5)
+        for cn in cns:
+            self.assertTrue(cn.closed)
+        self.assertEqual(
+            [thread.num for thread in selector_pool.threads if not thread.num],
+            [])
+
+    @skipUnless(hasattr(os, "fork"), "fork not available")
+    async def test_fork(self):
+        cn = await connect(dbname="postgres")
+        cr = cn.cursor()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                asyncio.new_event_loop().run_until_complete(
+                    cr.execute("SELECT 1"))
+            except InterfaceError:
+                # closing must not terminate the session of the parent
+                cn.close()
+                os._exit(0)
+            os._exit(1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(status, 0)
+        await cr.execute("SELECT 1")
+        self.assertEqual(cr.fetchone()[0], 1)
+        cn.close()
+
     async def test_commit(self):
         cn = await connect(dbname="postgres")
         with self.assertRaises(ProgrammingError):
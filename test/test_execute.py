@@ -1,4 +1,5 @@
 import asyncio
+import datetime
 import sys
 
 try:
@@ -6,11 +7,13 @@ try:
 except ImportError:
     from .async_case import IsolatedAsyncioTestCase
 
-from psycopg2 import ProgrammingError, InterfaceError
-from psycopg2.extensions import TRANSACTION_STATUS_IDLE, cursor
+from psycopg2 import ProgrammingError, InterfaceError, sql
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE, QueryCanceledError, cursor)
 from psycopg2.extras import DictCursor
 
-from psycaio import connect, AioCursorMixin
+from psycaio import connect, AioCursorMixin, Query
+from psycaio.jsontypes import LazyJson, register_json
 
 from .loops import loop_classes
 
@@ -88,8 +91,8 @@ class ExecTestCase(IsolatedAsyncioTestCase):
         task.cancel()
         with self.assertRaises(asyncio.CancelledError):
             await task
-        # asyncio Task is cancelled, but the underlying future is shielded to
-        # try to cancel the statement server side. At this moment that hasn't
+        # asyncio Task is cancelled, and psycaio tries to cancel the
+        # statement server side. At this moment that hasn't
         # happened yet, so we need to wait a bit.
         await asyncio.sleep(0.1)
         # check if statement is cancelled server side as well
@@ -103,6 +106,34 @@ class ExecTestCase(IsolatedAsyncioTestCase):
         self.assertEqual(
             self.cn.info.transaction_status, TRANSACTION_STATUS_IDLE)
 
+    async def test_timeout(self):
+        await self.cr.execute("SELECT 42", timeout=1)
+        self.assertEqual(self.cr.fetchone()[0], 42)
+
+        with self.assertRaises(QueryCanceledError):
+            await self.cr.execute("SELECT pg_sleep(5)", timeout=0.1)
+        self.assertEqual(
+            self.cn.info.transaction_status, TRANSACTION_STATUS_IDLE)
+
+        # the timeout only applied to the statement
+        await self.cr.execute("SHOW statement_timeout")
+        self.assertEqual(self.cr.fetchone()[0], "0")
+
+    async def test_timeout_lock(self):
+        task = asyncio.ensure_future(self.cr.execute("SELECT pg_sleep(0.5)"))
+        await asyncio.sleep(0.1)
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.cn.cursor().execute("SELECT 42", timeout=0.1)
+        await task
+
+    async def test_timeout_transaction(self):
+        await self.cr.execute("SET statement_timeout = 10000")
+        async with self.cn.transaction():
+            await self.cr.execute("SELECT %s", (42,), timeout=1)
+            self.assertEqual(self.cr.fetchone()[0], 42)
+            await self.cr.execute("SHOW statement_timeout")
+            self.assertEqual(self.cr.fetchone()[0], "10s")
+
     async def test_bad_cursor(self):
 
         class BadCursor:
@@ -181,6 +212,52 @@ class ExecTestCase(IsolatedAsyncioTestCase):
         with self.assertRaises(InterfaceError):
             await task
 
+    async def test_query_template(self):
+        query = "SELECT %s, %s, %s, %s, '%%'"
+        params = ("it's", [1, 2], datetime.date(2020, 1, 2), None)
+        expected = self.cr.mogrify(query, params)
+        await self.cr.execute(query, params)
+        self.assertEqual(self.cr.query, expected)
+        self.assertEqual(
+            self.cr.fetchone(), ("it's", [1, 2], params[2], None, "%"))
+        await self.cr.execute(Query(query), params)
+        self.assertEqual(self.cr.query, expected)
+
+        query = "SELECT %(a)s, %(a)s"
+        await self.cr.execute(query, {"a": "x"})
+        self.assertEqual(self.cr.fetchone(), ("x", "x"))
+
+        # many parameters use the template cache
+        query = "SELECT " + ", ".join(["%s"] * 20)
+        params = tuple(range(20))
+        expected = self.cr.mogrify(query, params)
+        await self.cr.execute(query, params)
+        self.assertEqual(self.cr.query, expected)
+        self.assertEqual(self.cr.fetchone(), params)
+
+        # errors are reported by psycopg2
+        with self.assertRaises(TypeError):
+            await self.cr.execute("SELECT %s, %s", (1,))
+
+    async def test_lazy_json(self):
+        register_json(self.cr, lazy=True)
+        await self.cr.execute(
+            """SELECT '{"a": 1}'::jsonb, '[1]'::json, NULL::jsonb""")
+        doc, array, null = self.cr.fetchone()
+        self.assertIsInstance(doc, LazyJson)
+        self.assertEqual(doc.raw, '{"a": 1}')
+        self.assertEqual(array, [1])
+        self.assertIsNone(null)
+
+        # passed through without decoding
+        await self.cr.execute("SELECT %s::jsonb -> 'a'", (doc,))
+        self.assertEqual(self.cr.fetchone()[0].value, 1)
+
+        # other cursors are not affected
+        cr = self.cn.cursor()
+        await cr.execute("""SELECT '{"a": 1}'::jsonb""")
+        self.assertEqual(cr.fetchone()[0], {"a": 1})
+
     async def test_executemany(self):
         await self.cr.execute("BEGIN")
         await self.cr.execute("CREATE TEMP TABLE test (val int)")
@@ -191,6 +268,56 @@ class ExecTestCase(IsolatedAsyncioTestCase):
         await self.cr.execute("DROP TABLE test")
         await self.cr.execute("ROLLBACK")
 
+    async def test_executemany_returning(self):
+        await self.cr.execute("BEGIN")
+        await self.cr.execute(
+            "CREATE TEMP TABLE test (id serial, val int, txt text)")
+        rows = await self.cr.executemany(
+            "INSERT INTO test (val, txt) VALUES (%s, '%%') RETURNING id, val",
+            ((i, ) for i in range(5)), returning=True, page_size=2)
+        self.assertEqual(rows, [(i + 1, i) for i in range(5)])
+
+        rows = await self.cr.executemany(
+            "INSERT INTO test (val) VALUES (%(val)s) RETURNING val",
+            [{"val": 7}], returning=True)
+        self.assertEqual(rows, [(7, )])
+
+        # executed per row
+        rows = await self.cr.executemany(
+            "UPDATE test SET val = val + 1 WHERE id = %s RETURNING val",
+            [(1, ), (2, )], returning=True)
+        self.assertEqual(rows, [(1, ), (2, )])
+        # statements without rows to return
+        rows = await self.cr.executemany(
+            "UPDATE test SET txt = 'x' WHERE id = %s", [(1, ), (2, )],
+            returning=True)
+        self.assertEqual(rows, [])
+        await self.cr.execute("SELECT count(*) FROM test WHERE txt = 'x'")
+        self.assertEqual(self.cr.fetchone()[0], 2)
+        await self.cr.execute("UPDATE test SET txt = '%' WHERE txt = 'x'")
+
+        with self.assertRaises(ValueError):
+            await self.cr.executemany(
+                "INSERT INTO test (val) VALUES (%s) RETURNING id", [(1, )],
+                returning=True, page_size=0)
+
+        # executed per row, because the rows conflict
+        await self.cr.execute("CREATE UNIQUE INDEX ON test (id)")
+        rows = await self.cr.executemany(
+            "INSERT INTO test (id, val) VALUES (%s, %s) "
+            "ON CONFLICT (id) DO UPDATE SET val = excluded.val RETURNING val",
+            [(10, 1), (10, 2)], returning=True)
+        self.assertEqual(rows, [(1, ), (2, )])
+
+        rows = await self.cr.executemany(
+            sql.SQL("INSERT INTO {} (val) VALUES (%s) RETURNING val").format(
+                sql.Identifier("test")),
+            [(8, ), (9, )], returning=True)
+        self.assertEqual(rows, [(8, ), (9, )])
+        await self.cr.execute("SELECT count(*) FROM test WHERE txt = '%'")
+        self.assertEqual(self.cr.fetchone()[0], 5)
+        await self.cr.execute("ROLLBACK")
+
 
 globals().update(**{cls.__name__: cls for cls in loop_classes(ExecTestCase)})
 del ExecTestCase
@@ -0,0 +1,75 @@
+import asyncio
+from time import monotonic
+
+try:
+    from unittest import IsolatedAsyncioTestCase
+except ImportError:
+    from .async_case import IsolatedAsyncioTestCase
+
+from psycopg2 import ProgrammingError
+
+from psycaio import connect, fan_out
+
+from .loops import loop_classes
+
+
+class FanOutTestCase(IsolatedAsyncioTestCase):
+
+    async def test_fan_out(self):
+        start = monotonic()
+        results = await fan_out(
+            [("SELECT %s, pg_sleep(0.2)", (i,)) for i in range(5)],
+            dbname="postgres")
+        self.assertLess(monotonic() - start, 0.8)
+        self.assertEqual([rows[0][0] for rows in results], list(range(5)))
+
+    async def test_no_rows(self):
+        results = await fan_out(
+            ["SET search_path = public"], dbname="postgres")
+        self.assertEqual(results, [None])
+        self.assertEqual(await fan_out([]), [])
+
+    async def test_no_connections(self):
+        with self.assertRaises(ValueError):
+            await fan_out(["SELECT 1"], [])
+        with self.assertRaises(ValueError):
+            await fan_out(["SELECT 1"], concurrency=0, dbname="postgres")
+
+    async def test_connections(self):
+        cns = [await connect(dbname="postgres") for _ in range(2)]
+        results = await fan_out(
+            ["SELECT 1", "SELECT 2", "SELECT 3"], cns, concurrency=1)
+        self.assertEqual(results, [[(1,)], [(2,)], [(3,)]])
+        for cn in cns:
+            self.assertFalse(cn.closed)
+            cn.close()
+
+    async def test_error(self):
+        cns = [await connect(dbname="postgres") for _ in range(2)]
+        start = monotonic()
+        with self.assertRaises(ProgrammingError):
+            await fan_out(["SELECT pg_sleep(5)", "SELECT * FROM nope"], cns)
+        # sibling got cancelled
+        self.assertLess(monotonic() - start, 2)
+        cr = cns[0].cursor()
+        await cr.execute("SELECT 42")
+        self.assertEqual(cr.fetchone()[0], 42)
+
+    async def test_return_exceptions(self):
+        results = await fan_out(
+            ["SELECT * FROM nope", "SELECT 42"], return_exceptions=True,
+            dbname="postgres")
+        self.assertIsInstance(results[0], ProgrammingError)
+        self.assertEqual(results[1], [(42,)])
+
+    async def test_cancel(self):
+        task = asyncio.ensure_future(fan_out(
+            ["SELECT pg_sleep(5)"] * 2, dbname="postgres"))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+
+globals().update(**{cls.__name__: cls for cls in loop_classes(FanOutTestCase)})
+del FanOutTestCase
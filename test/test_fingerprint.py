@@ -0,0 +1,25 @@
+from unittest import TestCase
+
+from psycaio.fingerprint import normalize, fingerprint
+
+
+class FingerprintTestCase(TestCase):
+
+    def test_normalize(self):
+        self.assertEqual(
+            normalize(
+                "SELECT * FROM t1\n  WHERE a = 1 AND b = 'x''y' -- comment\n"
+                "AND c IN (%s, %(name)s, 1.5e3, $1) /* comment */"),
+            "SELECT * FROM t1 WHERE a = ? AND b = ? AND c IN (?, ?, ?, ?)")
+
+    def test_quotes(self):
+        self.assertEqual(
+            normalize(b"SELECT $$a$$, $x$b$x$, E'a\\'b', \"Col1\" FROM x"),
+            'SELECT ?, ?, ?, "Col1" FROM x')
+
+    def test_fingerprint(self):
+        self.assertEqual(
+            fingerprint("SELECT 1"), fingerprint("select  2".upper()))
+        self.assertNotEqual(
+            fingerprint("SELECT 1 FROM a"), fingerprint("SELECT 1 FROM b"))
+        self.assertEqual(len(fingerprint("SELECT 1")), 16)
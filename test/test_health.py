@@ -0,0 +1,72 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from psycaio.health import HostHealth
+
+A = ("a", None, "5432")
+B = ("b", None, "5432")
+C = ("c", None, "5432")
+
+
+class HostHealthTestCase(TestCase):
+
+    def setUp(self):
+        self.health = HostHealth(failure_threshold=2, reset_timeout=10)
+
+    def test_unknown_order(self):
+        self.assertEqual(self.health.order([A, B, C]), [A, B, C])
+
+    def test_latency_order(self):
+        self.health.success(C, 0.01)
+        self.health.success(B, 0.02)
+        self.assertEqual(self.health.order([A, B, C]), [C, B, A])
+
+        # moving average
+        self.health.success(C, 0.1)
+        self.assertEqual(self.health.order([A, B, C]), [B, C, A])
+
+    def test_breaker(self):
+        self.health.failure(A)
+        self.assertEqual(self.health.order([A, B]), [A, B])
+        self.health.failure(A)
+        self.assertEqual(self.health.order([A, B]), [B, A])
+
+        # success closes the breaker again
+        self.health.success(A, 0.01)
+        self.assertEqual(self.health.order([A, B]), [A, B])
+
+    def test_half_open(self):
+        with patch("psycaio.health.monotonic", return_value=100):
+            self.health.failure(A)
+            self.health.failure(A)
+            self.health.failure(B)
+            self.health.failure(B)
+            self.assertEqual(self.health.order([A, B, C]), [C, A, B])
+
+        with patch("psycaio.health.monotonic", return_value=111):
+            # B is tripped later
+            self.health.failure(B)
+            self.health.failure(B)
+            # A is due for a probe now
+            self.assertEqual(self.health.order([B, C, A]), [C, A, B])
+
+            # only one probe at a time
+            self.health.attempt(A)
+            self.assertEqual(self.health.order([A, C]), [C, A])
+
+            # failed probe trips the breaker again
+            self.health.failure(A)
+            self.assertEqual(self.health.order([A, B, C]), [C, A, B])
+
+        with patch("psycaio.health.monotonic", return_value=122):
+            # both due for a probe
+            self.health.attempt(A)
+            self.assertEqual(self.health.order([A, B]), [B, A])
+            self.health.abort(A)
+            self.assertEqual(self.health.order([A, B]), [A, B])
+
+    def test_reset(self):
+        self.health.failure(A)
+        self.health.failure(A)
+        self.health.reset()
+        self.assertEqual(self.health.order([A, B]), [A, B])
@@ -0,0 +1,52 @@
+import json
+from unittest import TestCase
+
+from psycopg2.extensions import adapt, string_types
+
+from psycaio.jsontypes import LazyJson, register_json
+
+JSONB_OID = 3802
+
+# json, json[], jsonb and jsonb[], all registered by register_json
+JSON_OIDS = (114, 199, JSONB_OID, 3807)
+
+
+class LazyJsonTestCase(TestCase):
+
+    def test_lazy(self):
+        calls = []
+
+        def loads(raw):
+            calls.append(raw)
+            return json.loads(raw)
+
+        doc = LazyJson('{"a": [1, 2]}', loads)
+        self.assertEqual(calls, [])
+        self.assertEqual(doc["a"], [1, 2])
+        self.assertEqual(doc.get("b"), None)
+        self.assertEqual(doc, {"a": [1, 2]})
+        self.assertEqual(calls, ['{"a": [1, 2]}'])
+        self.assertEqual(doc.encode(), b'{"a": [1, 2]}')
+
+    def test_adapt(self):
+        doc = LazyJson('{"a": "it\'s"}')
+        self.assertEqual(adapt(doc).getquoted(), b"""'{"a": "it''s"}'""")
+
+    def test_register(self):
+        casters = {
+            oid: string_types[oid] for oid in JSON_OIDS
+            if oid in string_types}
+        try:
+            register_json(lazy=True)
+            value = string_types[JSONB_OID]('{"a": 1}', None)
+            self.assertIsInstance(value, LazyJson)
+            self.assertEqual(value["a"], 1)
+            self.assertIsNone(string_types[JSONB_OID](None, None))
+        finally:
+            for oid in JSON_OIDS:
+                if oid in casters:
+                    string_types[oid] = casters[oid]
+                else:
+                    string_types.pop(oid, None)
+        self.assertNotIsInstance(
+            string_types[114]('{"a": 1}', None), LazyJson)
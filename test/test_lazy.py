@@ -0,0 +1,85 @@
+import asyncio
+from unittest.mock import patch
+
+try:
+    from unittest import IsolatedAsyncioTestCase
+except ImportError:
+    from .async_case import IsolatedAsyncioTestCase
+
+from psycopg2 import InterfaceError, ProgrammingError
+
+from psycaio import lazy_connect, connect, AioConnection
+
+from .loops import loop_classes
+
+
+class LazyTestCase(IsolatedAsyncioTestCase):
+
+    async def test_lazy(self):
+        lc = lazy_connect(dbname="postgres")
+        self.assertFalse(lc.connected)
+        cr = lc.cursor()
+        self.assertIsNone(cr.description)
+        with self.assertRaises(ProgrammingError):
+            cr.fetchone()
+        self.assertFalse(lc.connected)
+
+        await cr.execute("SELECT 42")
+        self.assertTrue(lc.connected)
+        self.assertEqual(cr.fetchone()[0], 42)
+        self.assertIsInstance(await lc.get_connection(), AioConnection)
+        self.assertTrue(lc.dsn)
+        lc.close()
+        self.assertTrue(lc.closed)
+
+    async def test_shared_attempt(self):
+        lc = lazy_connect(dbname="postgres")
+        with patch("psycaio.lazy.connect", wraps=connect) as mock_connect:
+            await asyncio.gather(
+                lc.cursor().execute("SELECT 1"),
+                lc.cursor().callproc("now"),
+                lc.cursor().execute("SELECT 2"))
+        self.assertEqual(mock_connect.call_count, 1)
+        lc.close()
+
+    async def test_retry(self):
+        lc = lazy_connect(dbname="postgres", port="2345")
+        with self.assertRaises(Exception):
+            await lc.cursor().execute("SELECT 1")
+        lc._kwargs["port"] = "5432"
+        cr = lc.cursor()
+        await cr.execute("SELECT 1")
+        self.assertEqual(cr.fetchone()[0], 1)
+        lc.close()
+
+    async def test_notify(self):
+        lc = lazy_connect(dbname="postgres")
+        with self.assertRaises(asyncio.QueueEmpty):
+            lc.get_notify_nowait()
+        task = asyncio.ensure_future(lc.get_notify())
+        await asyncio.sleep(0.2)
+        self.assertTrue(lc.connected)
+        await lc.cursor().execute("LISTEN lazy")
+        await lc.cursor().execute("NOTIFY lazy, 'hi'")
+        self.assertEqual((await task).payload, 'hi')
+        lc.close()
+
+    async def test_transaction(self):
+        lc = lazy_connect(dbname="postgres")
+        async with lc.transaction():
+            cr = lc.cursor()
+            await cr.execute("SELECT 1")
+        lc.close()
+
+    async def test_close(self):
+        lc = lazy_connect(dbname="postgres")
+        lc.close()
+        self.assertTrue(lc.closed)
+        with self.assertRaises(InterfaceError):
+            await lc.cursor().execute("SELECT 1")
+        with self.assertRaises(InterfaceError):
+            lc.dsn
+
+
+globals().update(**{cls.__name__: cls for cls in loop_classes(LazyTestCase)})
+del LazyTestCase
@@ -0,0 +1,108 @@
+import asyncio
+import threading
+from time import monotonic
+
+try:
+    from unittest import IsolatedAsyncioTestCase
+except ImportError:
+    from .async_case import IsolatedAsyncioTestCase
+
+from psycaio.limits import ConnectLimiter
+from psycaio.utils import FairSemaphore
+
+
+class FairSemaphoreTestCase(IsolatedAsyncioTestCase):
+
+    async def test_order(self):
+        sem = FairSemaphore(1)
+        order = []
+
+        async def worker(i):
+            async with sem:
+                order.append(i)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*[worker(i) for i in range(5)])
+        self.assertEqual(order, list(range(5)))
+        self.assertFalse(sem.locked())
+
+    async def test_cancel(self):
+        sem = FairSemaphore(1)
+        await sem.acquire()
+        task = asyncio.ensure_future(sem.acquire())
+        await asyncio.sleep(0)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        sem.release()
+        self.assertFalse(sem.locked())
+
+    async def test_cancel_after_grant(self):
+        sem = FairSemaphore(1)
+        await sem.acquire()
+        task = asyncio.ensure_future(sem.acquire())
+        await asyncio.sleep(0)
+        # hand over the permit and cancel before the waiter wakes up
+        sem.release()
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertFalse(sem.locked())
+
+    async def test_threads(self):
+        sem = FairSemaphore(1)
+        await sem.acquire()
+
+        def thread_main():
+            async def acquire():
+                async with sem:
+                    pass
+            asyncio.new_event_loop().run_until_complete(acquire())
+
+        thread = threading.Thread(target=thread_main)
+        thread.start()
+        await asyncio.sleep(0.05)
+        self.assertTrue(thread.is_alive())
+        sem.release()
+        await asyncio.get_running_loop().run_in_executor(None, thread.join)
+        self.assertFalse(sem.locked())
+
+
+class ConnectLimiterTestCase(IsolatedAsyncioTestCase):
+
+    async def test_concurrency(self):
+        limiter = ConnectLimiter(max_concurrent=2)
+        running = 0
+        max_running = 0
+
+        async def worker():
+            nonlocal running, max_running
+            async with limiter.slot():
+                running += 1
+                max_running = max(max_running, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*[worker() for _ in range(6)])
+        self.assertEqual(max_running, 2)
+
+    async def test_rate(self):
+        limiter = ConnectLimiter(rate=100)
+        start = monotonic()
+
+        async def worker():
+            async with limiter.slot():
+                pass
+
+        await asyncio.gather(*[worker() for _ in range(6)])
+        self.assertGreaterEqual(monotonic() - start, 0.045)
+
+    async def test_configure(self):
+        limiter = ConnectLimiter()
+        with self.assertRaises(ValueError):
+            limiter.configure(max_concurrent=0)
+        with self.assertRaises(ValueError):
+            limiter.configure(rate=0)
+        limiter.configure(max_concurrent=1, rate=1000)
+        self.assertEqual(limiter.max_concurrent, 1)
+        self.assertEqual(limiter.rate, 1000)
@@ -0,0 +1,84 @@
+import random
+from unittest import TestCase
+
+from psycaio.loadgen import (
+    make_generator, percentile, Results, Workload, format_summary,
+    parse_args)
+
+
+class LoadgenTestCase(TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(1)
+
+    def test_generators(self):
+        gen = make_generator({"int": [1, 3]}, self.rng)
+        self.assertTrue(all(1 <= gen() <= 3 for _ in range(100)))
+        gen = make_generator({"choice": ["a", "b"]}, self.rng)
+        self.assertIn(gen(), ["a", "b"])
+        self.assertEqual(len(make_generator({"text": 5}, self.rng)()), 5)
+        self.assertEqual(len(make_generator({"uuid": True}, self.rng)()), 36)
+        gen = make_generator({"sequence": 10}, self.rng)
+        self.assertEqual([gen(), gen()], [10, 11])
+        self.assertEqual(make_generator({"value": "x"}, self.rng)(), "x")
+        with self.assertRaises(ValueError):
+            make_generator({"nope": 1}, self.rng)
+        with self.assertRaises(ValueError):
+            make_generator({"int": [1, 2], "text": 1}, self.rng)
+
+    def test_workload(self):
+        workload = Workload.from_dict({
+            "setup": ["SET search_path = public"],
+            "statements": [
+                {"sql": "SELECT 1", "weight": 3},
+                {"sql": "SELECT %(a)s", "params": {"a": {"value": 1}}},
+                {"sql": "SELECT %s", "params": [{"value": 2}], "weight": 0.1},
+            ]}, self.rng)
+        self.assertEqual(workload.setup, ["SET search_path = public"])
+        first, second, third = workload.statements
+        self.assertIsNone(first.params())
+        self.assertEqual(second.params(), {"a": 1})
+        self.assertEqual(third.params(), [2])
+
+        picked = [workload.pick(self.rng) for _ in range(1000)]
+        self.assertGreater(picked.count(first), picked.count(second))
+        self.assertGreater(picked.count(second), picked.count(third))
+
+        with self.assertRaises(ValueError):
+            Workload.from_dict({"statements": []}, self.rng)
+        with self.assertRaises(ValueError):
+            Workload.from_dict(
+                {"statements": [{"sql": "SELECT 1", "weight": 0}]}, self.rng)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile(values, 1), 100)
+        self.assertEqual(percentile([5], 0.9), 5)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_summary(self):
+        results = Results()
+        results.latencies.extend([0.002, 0.001, 0.003])
+        results.errors["QueryCanceledError"] += 1
+        summary = results.summary(
+            2.0, {"count": 2, "total": 0.002, "max": 0.0015})
+        self.assertEqual(summary["statements"], 3)
+        self.assertEqual(summary["throughput"], 1.5)
+        self.assertEqual(summary["p50"], 0.002)
+        self.assertEqual(summary["max"], 0.003)
+        self.assertEqual(summary["error_rate"], 0.25)
+        self.assertEqual(summary["error_types"], {"QueryCanceledError": 1})
+        self.assertEqual(summary["loop_lag_mean"], 0.001)
+        self.assertIn("errors=1 (25.00%)", format_summary(summary))
+
+        summary = Results().summary(1.0, {})
+        self.assertIsNone(summary["p99"])
+        self.assertIn("p99=-", format_summary(summary))
+
+    def test_args(self):
+        args = parse_args(["-c", "20", "work.json"])
+        self.assertEqual(args.concurrency, 20)
+        self.assertEqual(args.connections, 10)
+        self.assertEqual(args.loop, "default")
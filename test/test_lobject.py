@@ -0,0 +1,85 @@
+try:
+    from unittest import IsolatedAsyncioTestCase
+except ImportError:
+    from .async_case import IsolatedAsyncioTestCase
+
+from psycopg2 import NotSupportedError, ProgrammingError
+
+from psycaio import connect, AioLargeObject
+
+from .loops import loop_classes
+
+
+class LargeObjectTestCase(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.cn = await connect(dbname="postgres")
+
+    async def asyncTearDown(self):
+        self.cn.close()
+
+    async def test_write_read(self):
+        data = bytes(range(256)) * 100
+        async with self.cn.transaction():
+            lo = await self.cn.lobject(mode="wb", chunk_size=1000)
+            self.assertIsInstance(lo, AioLargeObject)
+            self.assertEqual(await lo.write(data), len(data))
+            await lo.close()
+            self.assertTrue(lo.closed)
+
+            async with await self.cn.lobject(lo.oid, chunk_size=1000) as lo2:
+                self.assertEqual(await lo2.read(10), data[:10])
+                self.assertEqual(await lo2.read(), data[10:])
+                self.assertEqual(await lo2.read(), b"")
+                self.assertEqual(await lo2.tell(), len(data))
+                self.assertEqual(await lo2.seek(-5, 2), len(data) - 5)
+                self.assertEqual(await lo2.read(2000), data[-5:])
+            self.assertTrue(lo2.closed)
+            await lo2.unlink()
+
+    async def test_stream(self):
+        chunks = [b"a" * 100, b"b" * 100, b"c" * 50]
+
+        async def source():
+            for chunk in chunks:
+                yield chunk
+
+        async with self.cn.transaction():
+            async with await self.cn.lobject(mode="rw", chunk_size=100) as lo:
+                self.assertEqual(await lo.write_from(source()), 250)
+                await lo.seek(0)
+                self.assertEqual([chunk async for chunk in lo], chunks)
+                await lo.truncate(10)
+                await lo.seek(0)
+                self.assertEqual(await lo.read(), b"a" * 10)
+            await lo.unlink()
+
+    async def test_new_oid(self):
+        async with self.cn.transaction():
+            lo = await self.cn.lobject(mode="w", new_oid=987654)
+            self.assertEqual(lo.oid, 987654)
+            await lo.unlink()
+
+    async def test_no_transaction(self):
+        with self.assertRaises(ProgrammingError):
+            await self.cn.lobject()
+
+    async def test_mode(self):
+        async with self.cn.transaction():
+            with self.assertRaises(NotSupportedError):
+                await self.cn.lobject(mode="rt")
+            with self.assertRaises(ValueError):
+                await self.cn.lobject(mode="x")
+
+    async def test_closed(self):
+        async with self.cn.transaction():
+            lo = await self.cn.lobject(mode="w")
+            await lo.close()
+            with self.assertRaises(ProgrammingError):
+                await lo.read()
+            await lo.unlink()
+
+
+globals().update(
+    **{cls.__name__: cls for cls in loop_classes(LargeObjectTestCase)})
+del LargeObjectTestCase
@@ -0,0 +1,45 @@
+from unittest import TestCase
+
+from psycaio.metrics import MetricsRegistry, Gauge, render
+
+
+class MetricsTestCase(TestCase):
+
+    def test_render(self):
+        registry = MetricsRegistry()
+        counter = registry.counter(
+            "requests_total", "Requests\nper host", ("host",))
+        gauge = registry.gauge("open", "Open things")
+        counter.inc('a"b')
+        counter.inc('a"b', amount=2)
+        counter.inc(None)
+        gauge.inc()
+        gauge.dec(amount=3)
+        self.assertEqual(counter.get('a"b'), 3)
+        with self.assertRaises(ValueError):
+            counter.inc("x", amount=-1)
+
+        def collect():
+            metric = Gauge("temperature", "Temperature", ("room",))
+            metric.set("hall", value=20.0)
+            return [metric]
+
+        registry.add_collector(collect)
+        self.assertEqual(registry.render(), "\n".join([
+            "# HELP requests_total Requests\\nper host",
+            "# TYPE requests_total counter",
+            'requests_total{host="a\\"b"} 3',
+            'requests_total{host=""} 1',
+            "# HELP open Open things",
+            "# TYPE open gauge",
+            "open -2",
+            "# HELP temperature Temperature",
+            "# TYPE temperature gauge",
+            'temperature{room="hall"} 20',
+            "",
+        ]))
+
+    def test_psycaio_metrics(self):
+        text = render()
+        self.assertIn("# TYPE psycaio_connect_attempts_total counter", text)
+        self.assertIn("psycaio_connections_open ", text)
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+
+try:
+    from unittest import IsolatedAsyncioTestCase
+except ImportError:
+    from .async_case import IsolatedAsyncioTestCase
+
+from psycopg2 import InterfaceError
+
+from psycaio.pool import SharedPool
+
+from .loops import loop_classes
+
+
+class PoolTestCase(IsolatedAsyncioTestCase):
+
+    async def test_reuse(self):
+        pool = SharedPool(1, dbname="postgres")
+        async with pool.connection() as cn1:
+            cr = cn1.cursor()
+            await cr.execute("SELECT 1")
+        async with pool.connection() as cn2:
+            self.assertIs(cn1, cn2)
+        pool.close()
+        self.assertTrue(cn1.closed)
+        with self.assertRaises(InterfaceError):
+            await pool.acquire()
+
+    async def test_transaction_not_reused(self):
+        pool = SharedPool(1, dbname="postgres")
+        async with pool.connection() as cn1:
+            await cn1.cursor().execute("BEGIN")
+        self.assertTrue(cn1.closed)
+        async with pool.connection() as cn2:
+            self.assertIsNot(cn1, cn2)
+        pool.close()
+
+    async def test_loops(self):
+        pool = SharedPool(1, dbname="postgres")
+        connections = set()
+        results = []
+
+        async def work():
+            async with pool.connection() as cn:
+                connections.add(cn)
+                cr = cn.cursor()
+                await cr.execute("LISTEN pool")
+                await cr.execute("NOTIFY pool")
+                await cn.get_notify()
+                await cr.execute("SELECT pg_backend_pid()")
+                results.append(cr.fetchone()[0])
+
+        def run():
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(work())
+            finally:
+                loop.close()
+
+        threads = [threading.Thread(target=run) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        await work()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(connections), 1)
+        self.assertEqual(len(set(results)), 1)
+        self.assertEqual(len(results), 4)
+        pool.close()
+
+
+globals().update(**{cls.__name__: cls for cls in loop_classes(PoolTestCase)})
+del PoolTestCase
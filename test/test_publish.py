@@ -0,0 +1,63 @@
+import asyncio
+
+try:
+    from unittest import IsolatedAsyncioTestCase
+except ImportError:
+    from .async_case import IsolatedAsyncioTestCase
+
+from psycopg2 import InterfaceError
+
+from psycaio import connect
+
+from .loops import loop_classes
+
+
+class PublishTestCase(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.listener = await connect(dbname="postgres")
+        await self.listener.cursor().execute("LISTEN a; LISTEN b")
+        self.cn = await connect(dbname="postgres")
+
+    async def asyncTearDown(self):
+        self.listener.close()
+        self.cn.close()
+
+    async def receive(self, num):
+        notifies = [await self.listener.get_notify() for _ in range(num)]
+        return [(notify.channel, notify.payload) for notify in notifies]
+
+    async def test_window(self):
+        publisher = self.cn.publisher(window=0.01)
+        futures = [
+            publisher.publish(channel, str(i))
+            for i, channel in enumerate("abab")]
+        await asyncio.gather(*futures)
+        self.assertEqual(
+            await self.receive(4),
+            [("a", "0"), ("b", "1"), ("a", "2"), ("b", "3")])
+
+    async def test_max_batch(self):
+        publisher = self.cn.publisher(window=10, max_batch=2)
+        first = publisher.publish("a", "1")
+        publisher.publish("a", "2")
+        await first
+        publisher.publish("b")
+        await publisher.close()
+        self.assertEqual(
+            await self.receive(3), [("a", "1"), ("a", "2"), ("b", "")])
+        with self.assertRaises(InterfaceError):
+            publisher.publish("a")
+
+    async def test_error(self):
+        publisher = self.cn.publisher()
+        fut = publisher.publish("a", "x" * 10000)
+        with self.assertRaises(Exception):
+            await publisher.flush()
+        with self.assertRaises(Exception):
+            await fut
+
+
+globals().update(
+    **{cls.__name__: cls for cls in loop_classes(PublishTestCase)})
+del PublishTestCase
@@ -0,0 +1,67 @@
+from unittest import TestCase
+
+from psycaio.query import _parse, TemplateCache, Query, split_values
+
+
+class ParseTestCase(TestCase):
+
+    def render(self, query, vars):  # noqa
+        return _parse(query).render(vars, None, "utf-8")
+
+    def test_positional(self):
+        self.assertEqual(
+            self.render(b"SELECT %s, '%%', %s", (1, None)),
+            b"SELECT 1, '%', NULL")
+
+    def test_named(self):
+        self.assertEqual(
+            self.render(b"SELECT %(a)s + %(b)s * %(a)s", {"a": 2, "b": 1.5}),
+            b"SELECT 2 + 1.5 * 2")
+        with self.assertRaises(KeyError):
+            self.render(b"SELECT %(a)s", {"b": 1})
+
+    def test_mismatch(self):
+        # left to psycopg2 to report the error
+        self.assertIsNone(self.render(b"SELECT %s, %s", (1,)))
+        self.assertIsNone(self.render(b"SELECT %s", {"a": 1}))
+        self.assertIsNone(self.render(b"SELECT %(a)s", (1,)))
+
+    def test_invalid(self):
+        self.assertIsNone(_parse(b"SELECT %s, %(a)s"))
+        self.assertIsNone(_parse(b"SELECT %d"))
+        self.assertIsNone(_parse(b"SELECT %(a"))
+        self.assertIsNone(_parse(b"SELECT 1 %"))
+        self.assertIsNone(_parse(b"SELECT 1"))
+
+
+class SplitValuesTestCase(TestCase):
+
+    def test_split(self):
+        self.assertEqual(
+            split_values(b"INSERT INTO t VALUES (%s, 'a)') RETURNING id"),
+            (b"INSERT INTO t VALUES ", b"(%s, 'a)')", b" RETURNING id"))
+        self.assertEqual(
+            split_values(b"insert into t values(lower(%(a)s), %(b)s)"),
+            (b"insert into t values", b"(lower(%(a)s), %(b)s)", b""))
+
+    def test_no_group(self):
+        self.assertIsNone(split_values(b"UPDATE t SET a = %s"))
+        self.assertIsNone(split_values(b"INSERT INTO t VALUES (%s"))
+        self.assertIsNone(split_values(b"INSERT INTO t VALUES ('a)"))
+
+
+class CacheTestCase(TestCase):
+
+    def test_lru(self):
+        cache = TemplateCache(2)
+        template = cache.get("SELECT %s", "utf-8")
+        self.assertIs(cache.get("SELECT %s", "utf-8"), template)
+        cache.get("SELECT %s, 1", "utf-8")
+        cache.get("SELECT %s, 2", "utf-8")
+        self.assertIsNot(cache.get("SELECT %s", "utf-8"), template)
+
+    def test_query(self):
+        query = Query("SELECT %s")
+        self.assertEqual(query, "SELECT %s")
+        template = query._get_template("utf-8")
+        self.assertIs(query._get_template("utf-8"), template)
@@ -0,0 +1,80 @@
+from unittest import TestCase
+
+try:
+    from unittest import IsolatedAsyncioTestCase
+except ImportError:
+    from .async_case import IsolatedAsyncioTestCase
+
+from psycopg2 import OperationalError
+
+from psycaio import AioConnection
+from psycaio.routing import ReplicaRouter
+
+from .loops import loop_classes
+
+
+class _FakeConnection:
+    closed = 0
+
+
+class RoutingTestCase(TestCase):
+
+    def test_entries(self):
+        router = ReplicaRouter("host=a,b,c port=5432 dbname=test")
+        self.assertEqual(
+            [member.entry for member in router._members],
+            [("a", None, "5432"), ("b", None, "5432"), ("c", None, "5432")])
+
+    def test_standby_choice(self):
+        router = ReplicaRouter(host="a,b,c,d", max_lag=5)
+        states = [(True, 0), (False, 3.0), (False, 1.0), (False, 8.0)]
+        for member, (primary, lag) in zip(router._members, states):
+            member.connection = _FakeConnection()
+            member.primary = primary
+            member.lag = lag
+        self.assertIs(router._primary(), router._members[0])
+        self.assertIs(router._standby(), router._members[2])
+        self.assertEqual(router.lags(), {
+            ("b", None, None): 3.0, ("c", None, None): 1.0,
+            ("d", None, None): 8.0})
+
+        # unknown lag or too much lag is not eligible
+        router._members[1].lag = router._members[2].lag = None
+        self.assertIsNone(router._standby())
+
+
+class RouterTestCase(IsolatedAsyncioTestCase):
+
+    async def test_primary(self):
+        async with ReplicaRouter(dbname="postgres") as router:
+            cn = await router.connection()
+            self.assertIsInstance(cn, AioConnection)
+            # no standby, so reads go to the primary as well
+            self.assertIs(await router.connection(readonly=True), cn)
+            cr = await router.cursor(readonly=True)
+            await cr.execute("SELECT 1")
+            self.assertEqual(cr.fetchone()[0], 1)
+            self.assertEqual(router.lags(), {})
+        self.assertTrue(router.closed)
+        self.assertTrue(cn.closed)
+
+    async def test_session(self):
+        async with ReplicaRouter(dbname="postgres") as router:
+            session = router.session()
+            await session.connection(readonly=True)
+            self.assertFalse(session.wrote)
+            await session.cursor()
+            self.assertTrue(session.wrote)
+
+    async def test_no_primary(self):
+        router = ReplicaRouter(dbname="postgres", port="2345")
+        with self.assertRaises(OperationalError):
+            await router.connection()
+        router.close()
+        with self.assertRaises(OperationalError):
+            await router.connection()
+
+
+globals().update(
+    **{cls.__name__: cls for cls in loop_classes(RouterTestCase)})
+del RouterTestCase
@@ -0,0 +1,71 @@
+import datetime
+from decimal import Decimal
+from unittest import TestCase
+
+try:
+    from unittest import IsolatedAsyncioTestCase
+except ImportError:
+    from .async_case import IsolatedAsyncioTestCase
+
+from psycaio import connect
+from psycaio.rows import AioLazyCursor, LazyRow
+
+from .loops import loop_classes
+
+
+class _FakeCursor:
+
+    def __init__(self, casters):
+        self.casters = casters
+
+    def _get_casters(self):
+        return self.casters
+
+
+class LazyRowTestCase(TestCase):
+
+    def test_lazy(self):
+        calls = []
+
+        def caster(value, cursor):
+            calls.append(value)
+            return int(value)
+
+        row = LazyRow(_FakeCursor([None, caster, caster]))
+        for i, value in enumerate(["a", "1", None]):
+            row[i] = value
+        self.assertEqual(calls, [])
+        self.assertEqual(row[1], 1)
+        self.assertEqual(row[-2], 1)
+        self.assertEqual(calls, ["1"])
+        self.assertEqual(row, ("a", 1, None))
+        self.assertEqual(row[:2], ("a", 1))
+        self.assertEqual(len(row), 3)
+        self.assertEqual(calls, ["1"])
+
+
+class LazyCursorTestCase(IsolatedAsyncioTestCase):
+
+    async def test_lazy_cursor(self):
+        cn = await connect(dbname="postgres")
+        cr = cn.cursor(cursor_factory=AioLazyCursor)
+        await cr.execute(
+            "SELECT 1, 'a', 1.5::numeric, '2020-01-02'::date, "
+            "ARRAY['2020-01-02'::date], NULL::numeric")
+        row = cr.fetchone()
+        self.assertIsInstance(row, LazyRow)
+        self.assertEqual(row._values[2], "1.5")
+        self.assertEqual(row[2], Decimal("1.5"))
+        date = datetime.date(2020, 1, 2)
+        self.assertEqual(row, (1, "a", Decimal("1.5"), date, [date], None))
+
+        # other cursors are not affected
+        cr = cn.cursor()
+        await cr.execute("SELECT 1.5::numeric")
+        self.assertEqual(cr.fetchone()[0], Decimal("1.5"))
+        cn.close()
+
+
+globals().update(
+    **{cls.__name__: cls for cls in loop_classes(LazyCursorTestCase)})
+del LazyCursorTestCase
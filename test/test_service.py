@@ -0,0 +1,76 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from psycopg2 import OperationalError
+
+from psycaio.service import get_service_params
+
+
+class ServiceTestCase(TestCase):
+
+    def setUp(self):
+        self.environ = os.environ.copy()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ.pop("PGSERVICEFILE", None)
+        os.environ.pop("PGSYSCONFDIR", None)
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+        self.tmpdir.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_service_file(self):
+        os.environ["PGSERVICEFILE"] = self.write("services", (
+            "# comment\n"
+            "\n"
+            "[one]\n"
+            "  host=db1.example.com\n"
+            "port = 5433\n"
+            "[two]\n"
+            "dbname=two\n"))
+        self.assertEqual(
+            get_service_params("one"),
+            {"host": "db1.example.com", "port": "5433"})
+        self.assertEqual(get_service_params("two"), {"dbname": "two"})
+        self.assertIsNone(get_service_params("three"))
+
+    def test_sysconfdir(self):
+        os.environ["PGSERVICEFILE"] = self.write(
+            "services", "[one]\ndbname=user\n")
+        self.write("pg_service.conf", "[one]\ndbname=sys\n[two]\ndbname=sys")
+        os.environ["PGSYSCONFDIR"] = self.tmpdir.name
+        self.assertEqual(get_service_params("one"), {"dbname": "user"})
+        self.assertEqual(get_service_params("two"), {"dbname": "sys"})
+
+    def test_cache(self):
+        path = self.write("services", "[one]\ndbname=old\n")
+        os.environ["PGSERVICEFILE"] = path
+        self.assertEqual(get_service_params("one"), {"dbname": "old"})
+        self.write("services", "[one]\ndbname=new\n")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertEqual(get_service_params("one"), {"dbname": "new"})
+
+    def test_syntax_error(self):
+        os.environ["PGSERVICEFILE"] = self.write(
+            "services", "[one]\ndbname\n")
+        with self.assertRaises(OperationalError):
+            get_service_params("one")
+
+        os.environ["PGSERVICEFILE"] = self.write(
+            "services2", "[one\ndbname=x\n")
+        with self.assertRaises(OperationalError):
+            get_service_params("one")
+
+    def test_nested(self):
+        os.environ["PGSERVICEFILE"] = self.write(
+            "services", "[one]\nservice=two\n")
+        with self.assertRaises(OperationalError):
+            get_service_params("one")
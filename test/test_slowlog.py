@@ -0,0 +1,112 @@
+import asyncio
+from unittest import TestCase
+
+try:
+    from unittest import IsolatedAsyncioTestCase
+except ImportError:
+    from .async_case import IsolatedAsyncioTestCase
+
+from psycaio import connect
+from psycaio.hooks import add_statement_listener, remove_statement_listener
+from psycaio.slowlog import SlowQueryLog
+
+from .loops import loop_classes
+
+
+class ExplainTestCase(TestCase):
+
+    def test_may_explain(self):
+        slow_log = SlowQueryLog(explain_dsn="dbname=postgres")
+        self.assertTrue(slow_log._may_explain("SELECT 1;"))
+        self.assertTrue(slow_log._may_explain("select ';' -- ;"))
+        self.assertFalse(slow_log._may_explain("VACUUM"))
+        self.assertFalse(
+            slow_log._may_explain("SELECT 1; UPDATE counters SET n = n + 1"))
+        self.assertFalse(SlowQueryLog()._may_explain("SELECT 1"))
+
+
+class SlowLogTestCase(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.cn = await connect(dbname="postgres")
+        self.cr = self.cn.cursor()
+
+    async def asyncTearDown(self):
+        self.cn.close()
+
+    async def test_listener(self):
+        calls = []
+
+        def listener(*args):
+            calls.append(args)
+
+        add_statement_listener(listener)
+        try:
+            await self.cr.execute("SELECT %s", (1,))
+            await self.cr.execute("SELECT %s", (2,), timeout=1)
+            await self.cr.callproc("generate_series", (1, 1))
+            with self.assertRaises(Exception):
+                await self.cr.execute("SELECT * FROM nope")
+        finally:
+            remove_statement_listener(listener)
+        await self.cr.execute("SELECT 3")
+
+        self.assertEqual(len(calls), 4)
+        cursor, query, vars, lock_wait, duration, error = calls[0]
+        self.assertIs(cursor, self.cr)
+        self.assertEqual((query, vars, error), ("SELECT %s", (1,), None))
+        self.assertGreaterEqual(lock_wait, 0)
+        self.assertGreater(duration, 0)
+        self.assertEqual(calls[1][1:3], ("SELECT %s", (2,)))
+        self.assertEqual(
+            calls[2][1:3], (b"SELECT * FROM generate_series(1,1)", None))
+        self.assertIsNotNone(calls[3][5])
+
+    async def test_slow_log(self):
+        slow_log = SlowQueryLog(threshold=0.1, explain_dsn="dbname=postgres")
+        slow_log.enable()
+        try:
+            with self.assertLogs("psycaio.slowlog") as logs:
+                await self.cr.execute("SELECT 1")
+                await self.cr.execute("SELECT pg_sleep(%s)", (0.2,))
+                await slow_log._explain_task
+        finally:
+            slow_log.disable()
+
+        self.assertEqual(len(logs.records), 2)
+        record = logs.records[0].slow_query
+        self.assertEqual(record["query"], "SELECT pg_sleep(?)")
+        self.assertEqual(record["num_params"], 1)
+        self.assertGreaterEqual(record["duration"], 0.2)
+        self.assertIsNone(record["error"])
+        self.assertIn("Result", logs.records[1].plan)
+
+    async def test_sample_rate(self):
+        slow_log = SlowQueryLog(threshold=0, sample_rate=0)
+        slow_log.enable()
+        try:
+            with self.assertRaises(AssertionError):
+                with self.assertLogs("psycaio.slowlog"):
+                    await self.cr.execute("SELECT 1")
+        finally:
+            slow_log.disable()
+
+    async def test_explain_rate(self):
+        slow_log = SlowQueryLog(threshold=0, explain_dsn="dbname=postgres")
+        slow_log.enable()
+        try:
+            with self.assertLogs("psycaio.slowlog") as logs:
+                await self.cr.execute("SELECT 1")
+                await self.cr.execute("SELECT 2")
+                await slow_log._explain_task
+                await self.cr.execute("SELECT 3")
+                await asyncio.sleep(0.1)
+        finally:
+            slow_log.disable()
+        # three statements, one plan
+        self.assertEqual(len(logs.records), 4)
+
+
+globals().update(
+    **{cls.__name__: cls for cls in loop_classes(SlowLogTestCase)})
+del SlowLogTestCase
@@ -0,0 +1,55 @@
+try:
+    from unittest import IsolatedAsyncioTestCase
+except ImportError:
+    from .async_case import IsolatedAsyncioTestCase
+
+from psycaio.stats import StatementStats
+
+
+class FakeCursor:
+
+    def __init__(self, rowcount):
+        self.rowcount = rowcount
+
+
+class StatsTestCase(IsolatedAsyncioTestCase):
+
+    async def test_aggregate(self):
+        stats = StatementStats()
+        stats(FakeCursor(2), "SELECT * FROM t WHERE a = %s", (1,), 0, 0.2,
+              None)
+        stats(FakeCursor(3), "SELECT * FROM t WHERE a = 5", None, 0, 0.1,
+              None)
+        stats(FakeCursor(-1), b"SELECT  * FROM t WHERE a = 'x'", None, 0,
+              0.3, ValueError())
+
+        snapshot = await stats.snapshot()
+        self.assertEqual(len(snapshot), 1)
+        entry = list(snapshot.values())[0]
+        self.assertEqual(entry["query"], "SELECT * FROM t WHERE a = ?")
+        self.assertEqual(entry["calls"], 3)
+        self.assertEqual(entry["errors"], 1)
+        self.assertEqual(entry["rows"], 5)
+        self.assertAlmostEqual(entry["total_time"], 0.6)
+        self.assertAlmostEqual(entry["mean_time"], 0.2)
+        self.assertEqual(entry["min_time"], 0.1)
+        self.assertEqual(entry["max_time"], 0.3)
+
+    async def test_bounded(self):
+        stats = StatementStats(max_entries=2)
+        stats(FakeCursor(1), "SELECT 1 FROM a", None, 0, 0.1, None)
+        stats(FakeCursor(1), "SELECT 1 FROM b", None, 0, 0.1, None)
+        stats(FakeCursor(1), "SELECT 1 FROM a", None, 0, 0.1, None)
+        stats(FakeCursor(1), "SELECT 1 FROM c", None, 0, 0.1, None)
+        queries = {
+            entry["query"] for entry in (await stats.snapshot()).values()}
+        self.assertEqual(queries, {"SELECT ? FROM a", "SELECT ? FROM c"})
+
+    async def test_reset(self):
+        stats = StatementStats()
+        stats(FakeCursor(1), "SELECT 1", None, 0, 0.1, None)
+        self.assertEqual(len(await stats.snapshot(reset=True)), 1)
+        self.assertEqual(await stats.snapshot(), {})
+        stats(FakeCursor(1), "SELECT 1", None, 0, 0.1, None)
+        await stats.reset()
+        self.assertEqual(await stats.snapshot(), {})
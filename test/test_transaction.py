@@ -0,0 +1,190 @@
+import asyncio
+
+try:
+    from unittest import IsolatedAsyncioTestCase
+except ImportError:
+    from .async_case import IsolatedAsyncioTestCase
+
+from psycopg2 import (
+    DatabaseError, InternalError, ProgrammingError, errorcodes)
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS)
+
+from psycaio import connect
+
+from .loops import loop_classes
+
+
+class TransactionTestCase(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.cn = await connect(dbname="postgres")
+        self.cr = self.cn.cursor()
+        await self.cr.execute("CREATE TEMP TABLE test (val int)")
+
+    async def asyncTearDown(self):
+        self.cn.close()
+
+    async def count(self):
+        await self.cr.execute("SELECT count(*) FROM test")
+        return self.cr.fetchone()[0]
+
+    async def test_commit(self):
+        async with self.cn.transaction():
+            # BEGIN is deferred
+            self.assertEqual(
+                self.cn.get_transaction_status(), TRANSACTION_STATUS_IDLE)
+            await self.cr.execute("INSERT INTO test VALUES (%s)", (1,))
+            self.assertEqual(
+                self.cn.get_transaction_status(), TRANSACTION_STATUS_INTRANS)
+            await self.cr.execute("SELECT val FROM test")
+            self.assertEqual(self.cr.fetchone()[0], 1)
+        self.assertEqual(
+            self.cn.get_transaction_status(), TRANSACTION_STATUS_IDLE)
+        self.assertEqual(await self.count(), 1)
+
+    async def test_rollback(self):
+        with self.assertRaises(ZeroDivisionError):
+            async with self.cn.transaction():
+                await self.cr.execute("INSERT INTO test VALUES (1)")
+                1 / 0
+        self.assertEqual(await self.count(), 0)
+
+    async def test_error(self):
+        with self.assertRaises(ProgrammingError):
+            async with self.cn.transaction():
+                await self.cr.execute("INSERT INTO test VALUES (1)")
+                await self.cr.execute("SELECT * FROM nope")
+        self.assertEqual(
+            self.cn.get_transaction_status(), TRANSACTION_STATUS_IDLE)
+        self.assertEqual(await self.count(), 0)
+
+    async def test_bad_parameters(self):
+        async with self.cn.transaction():
+            with self.assertRaises(IndexError):
+                await self.cr.execute("SELECT %s, %s", (1,))
+            await self.cr.execute("INSERT INTO test VALUES (1)")
+            self.assertEqual(
+                self.cn.get_transaction_status(), TRANSACTION_STATUS_INTRANS)
+        self.assertEqual(await self.count(), 1)
+
+    async def test_syntax_error(self):
+        async with self.cn.transaction():
+            # BEGIN is rejected together with the statement
+            with self.assertRaises(ProgrammingError):
+                await self.cr.execute("SELEC 1")
+            self.assertEqual(
+                self.cn.get_transaction_status(), TRANSACTION_STATUS_IDLE)
+            await self.cr.execute("INSERT INTO test VALUES (1)")
+            self.assertEqual(
+                self.cn.get_transaction_status(), TRANSACTION_STATUS_INTRANS)
+        self.assertEqual(await self.count(), 1)
+
+    async def test_savepoint_syntax_error(self):
+        with self.assertRaises(InternalError):
+            async with self.cn.transaction():
+                await self.cr.execute("INSERT INTO test VALUES (1)")
+                with self.assertRaises(DatabaseError) as cm:
+                    async with self.cn.transaction():
+                        await self.cr.execute("SELEC 1")
+                # The SAVEPOINT was rejected together with the statement, so
+                # the enclosing transaction is aborted
+                self.assertEqual(
+                    cm.exception.pgcode,
+                    errorcodes.INVALID_SAVEPOINT_SPECIFICATION)
+                self.assertEqual(
+                    cm.exception.__context__.pgcode, errorcodes.SYNTAX_ERROR)
+        self.assertEqual(
+            self.cn.get_transaction_status(), TRANSACTION_STATUS_IDLE)
+        self.assertEqual(await self.count(), 0)
+
+    async def test_aborted(self):
+        with self.assertRaises(InternalError):
+            async with self.cn.transaction():
+                await self.cr.execute("INSERT INTO test VALUES (1)")
+                with self.assertRaises(ProgrammingError):
+                    await self.cr.execute("SELECT * FROM nope")
+        self.assertEqual(
+            self.cn.get_transaction_status(), TRANSACTION_STATUS_IDLE)
+        self.assertEqual(await self.count(), 0)
+
+    async def test_shared_connection(self):
+        running = asyncio.ensure_future(
+            self.cn.cursor().execute("SELECT pg_sleep(0.1)"))
+        await asyncio.sleep(0.05)
+        # the running statement is not a transaction
+        async with self.cn.transaction():
+            await self.cr.execute("INSERT INTO test VALUES (1)")
+        await running
+        self.assertEqual(await self.count(), 1)
+
+    async def test_empty(self):
+        async with self.cn.transaction():
+            async with self.cn.transaction():
+                pass
+        self.assertEqual(
+            self.cn.get_transaction_status(), TRANSACTION_STATUS_IDLE)
+
+    async def test_savepoint(self):
+        async with self.cn.transaction():
+            await self.cr.execute("INSERT INTO test VALUES (1)")
+            with self.assertRaises(ProgrammingError):
+                async with self.cn.transaction() as tr:
+                    self.assertIsNotNone(tr.savepoint)
+                    await self.cr.execute("INSERT INTO test VALUES (2)")
+                    await self.cr.execute("SELECT * FROM nope")
+            async with self.cn.transaction():
+                await self.cr.execute("INSERT INTO test VALUES (3)")
+        await self.cr.execute("SELECT val FROM test ORDER BY val")
+        self.assertEqual(self.cr.fetchall(), [(1,), (3,)])
+
+    async def test_deferred_savepoint(self):
+        async with self.cn.transaction():
+            async with self.cn.transaction():
+                # BEGIN and SAVEPOINT are sent with this statement
+                await self.cr.execute("INSERT INTO test VALUES (1)")
+        self.assertEqual(await self.count(), 1)
+
+    async def test_callproc(self):
+        async with self.cn.transaction():
+            await self.cr.callproc("txid_current_if_assigned")
+            self.assertEqual(
+                self.cn.get_transaction_status(), TRANSACTION_STATUS_INTRANS)
+
+    async def test_cancel(self):
+
+        async def run():
+            async with self.cn.transaction():
+                await self.cr.execute("INSERT INTO test VALUES (1)")
+                await self.cr.execute("SELECT pg_sleep(5)")
+
+        task = asyncio.ensure_future(run())
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(
+            self.cn.get_transaction_status(), TRANSACTION_STATUS_IDLE)
+        self.assertEqual(await self.count(), 0)
+
+    async def test_already_in_transaction(self):
+        await self.cr.execute("BEGIN")
+        with self.assertRaises(ProgrammingError):
+            async with self.cn.transaction():
+                pass
+        await self.cr.execute("ROLLBACK")
+
+    async def test_order(self):
+        tr1 = self.cn.transaction()
+        tr2 = self.cn.transaction()
+        await tr1.__aenter__()
+        await tr2.__aenter__()
+        with self.assertRaises(ProgrammingError):
+            await tr1.__aexit__(None, None, None)
+        await tr2.__aexit__(None, None, None)
+        await tr1.__aexit__(None, None, None)
+
+
+globals().update(
+    **{cls.__name__: cls for cls in loop_classes(TransactionTestCase)})
+del TransactionTestCase
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+try:
+    from unittest import IsolatedAsyncioTestCase
+except ImportError:
+    from .async_case import IsolatedAsyncioTestCase
+
+from psycaio.utils import SelectorPool
+from psycaio.watchdog import Watchdog, blocking_section
+
+
+class WatchdogTestCase(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.watchdog = Watchdog(threshold=0.05)
+        self.watchdog.enable()
+
+    def tearDown(self):
+        self.watchdog.disable()
+
+    async def test_section(self):
+        with self.assertLogs("psycaio.watchdog") as logs:
+            with blocking_section("test"):
+                time.sleep(0.06)
+            with blocking_section("test"):
+                pass
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(logs.records[0].section, "test")
+
+        stats = self.watchdog.snapshot(reset=True)["test"]
+        self.assertEqual(stats["count"], 2)
+        self.assertGreaterEqual(stats["max"], 0.06)
+        self.assertGreaterEqual(stats["total"], stats["max"])
+        self.assertEqual(self.watchdog.snapshot(), {})
+
+    async def test_disabled(self):
+        self.watchdog.disable()
+        with blocking_section("test"):
+            pass
+        self.assertEqual(self.watchdog.snapshot(), {})
+
+    async def test_thread_start(self):
+        pool = SelectorPool()
+        thread = pool.get_thread()
+        thread.decrement()
+        self.assertEqual(self.watchdog.snapshot()["thread_start"]["count"], 1)
+        thread.loop.call_soon_threadsafe(thread.loop.stop)
+
+    async def test_monitor(self):
+        task = asyncio.ensure_future(self.watchdog.monitor(0.01))
+        await asyncio.sleep(0.02)
+        with self.assertLogs("psycaio.watchdog"):
+            time.sleep(0.1)
+            await asyncio.sleep(0.02)
+        task.cancel()
+        stats = self.watchdog.snapshot()["loop_lag"]
+        self.assertGreaterEqual(stats["max"], 0.05)
@@ -0,0 +1,32 @@
+import os
+from unittest import TestCase, skipUnless
+
+from psycaio.utils import SelectorPool
+from psycaio.workers import run_workers
+
+
+async def worker(index, value):
+    return index * value
+
+
+class WorkersTestCase(TestCase):
+
+    def test_run_workers(self):
+        self.assertEqual(run_workers(worker, 3, (2,)), [0, 2, 4])
+
+    @skipUnless(hasattr(os, "fork"), "fork not available")
+    def test_fork_pool(self):
+        pool = SelectorPool()
+        thread = pool.get_thread()
+        pid = os.fork()
+        if pid == 0:
+            # child, the inherited thread is not running here
+            new_thread = pool.get_thread()
+            os._exit(
+                0 if new_thread is not thread and new_thread.is_alive()
+                else 1)
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(status, 0)
+        self.assertIs(pool.get_thread(), thread)
+        thread.num = 0
+        pool.shutdown()